@@ -0,0 +1,200 @@
+import numpy as np
+
+from rasterizers import as_segments
+
+INSIDE, LEFT, RIGHT, BOTTOM, TOP = 0, 1, 2, 4, 8
+# Насколько пиксель отрезка может отстоять от идеальной прямой по ведомой оси (у Ву — до двух)
+STEP_MARGIN = 2
+
+
+class ClipStats:
+    """Счётчики отсечения: отброшенные, принятые целиком и обрезанные отрезки."""
+
+    def __init__(self):
+        self.rejected = 0
+        self.accepted = 0
+        self.trimmed = 0
+
+    def update(self, visible, trimmed):
+        trimmed = visible & trimmed
+        self.rejected += int((~visible).sum())
+        self.trimmed += int(trimmed.sum())
+        self.accepted += int((visible & ~trimmed).sum())
+
+    def __repr__(self):
+        return f"отброшено: {self.rejected}, принято: {self.accepted}, обрезано: {self.trimmed}"
+
+
+def _outcodes(x, y, rect):
+    xmin, ymin, xmax, ymax = rect
+    code = np.zeros(x.shape, dtype=np.int8)
+    code |= np.where(x < xmin, LEFT, 0).astype(np.int8)
+    code |= np.where(x > xmax, RIGHT, 0).astype(np.int8)
+    code |= np.where(y < ymin, BOTTOM, 0).astype(np.int8)
+    code |= np.where(y > ymax, TOP, 0).astype(np.int8)
+    return code
+
+
+def cohen_sutherland(segments, rect, stats=None):
+    """Отсечение Коэна–Сазерленда для массива отрезков (N, 4) прямоугольником (xmin, ymin, xmax, ymax).
+
+    Возвращает (отрезки float64, маска видимых). Невидимые строки результата не определены.
+    """
+    seg = np.array(segments, dtype=np.float64).reshape(-1, 4)
+    x1, y1, x2, y2 = seg.T
+    xmin, ymin, xmax, ymax = rect
+    code1, code2 = _outcodes(x1, y1, rect), _outcodes(x2, y2, rect)
+    trivial = (code1 | code2) == 0
+    visible = trivial.copy()
+    active = ~trivial & ((code1 & code2) == 0)
+
+    while active.any():
+        idx = np.nonzero(active)[0]
+        c1, c2 = code1[idx], code2[idx]
+        # Переносим ту концевую точку, что лежит снаружи
+        first = c1 != 0
+        code = np.where(first, c1, c2)
+        ax, ay, bx, by = x1[idx], y1[idx], x2[idx], y2[idx]
+        dx, dy = bx - ax, by - ay
+        with np.errstate(divide="ignore", invalid="ignore"):
+            nx = np.select([code & TOP != 0, code & BOTTOM != 0, code & RIGHT != 0],
+                           [ax + dx * (ymax - ay) / dy, ax + dx * (ymin - ay) / dy, np.full(len(idx), xmax)],
+                           np.full(len(idx), xmin))
+            ny = np.select([code & TOP != 0, code & BOTTOM != 0, code & RIGHT != 0],
+                           [np.full(len(idx), ymax), np.full(len(idx), ymin), ay + dy * (xmax - ax) / dx],
+                           ay + dy * (xmin - ax) / dx)
+
+        x1[idx] = np.where(first, nx, ax)
+        y1[idx] = np.where(first, ny, ay)
+        x2[idx] = np.where(first, bx, nx)
+        y2[idx] = np.where(first, by, ny)
+        code1[idx] = _outcodes(x1[idx], y1[idx], rect)
+        code2[idx] = _outcodes(x2[idx], y2[idx], rect)
+
+        done = (code1[idx] | code2[idx]) == 0
+        visible[idx[done]] = True
+        active[idx[done | ((code1[idx] & code2[idx]) != 0)]] = False
+
+    if stats is not None:
+        stats.update(visible, ~trivial)
+    return seg, visible
+
+
+def liang_barsky(segments, rect, stats=None):
+    """Отсечение Лянга–Барски для массива отрезков (N, 4) прямоугольником (xmin, ymin, xmax, ymax).
+
+    Возвращает (отрезки float64, маска видимых). Невидимые строки результата не определены.
+    """
+    seg = np.array(segments, dtype=np.float64).reshape(-1, 4)
+    x1, y1, x2, y2 = seg.T
+    xmin, ymin, xmax, ymax = rect
+    dx, dy = x2 - x1, y2 - y1
+
+    p = np.stack((-dx, dx, -dy, dy))
+    q = np.stack((x1 - xmin, xmax - x1, y1 - ymin, ymax - y1))
+    visible = ~((p == 0) & (q < 0)).any(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = q / p
+    t0 = np.max(np.where(p < 0, r, 0.0), axis=0)
+    t1 = np.min(np.where(p > 0, r, 1.0), axis=0)
+    visible &= t0 <= t1
+
+    trimmed = (t0 > 0) | (t1 < 1)
+    seg = np.stack((x1 + t0 * dx, y1 + t0 * dy, x1 + t1 * dx, y1 + t1 * dy), axis=1)
+    # Неизменённые концы сохраняем точно, без погрешности t * d
+    seg[:, :2] = np.where((t0 > 0)[:, None], seg[:, :2], np.stack((x1, y1), axis=1))
+    seg[:, 2:] = np.where((t1 < 1)[:, None], seg[:, 2:], np.stack((x2, y2), axis=1))
+
+    if stats is not None:
+        stats.update(visible, trimmed)
+    return seg, visible
+
+
+CLIPPERS = {
+    "Cohen-Sutherland": cohen_sutherland,
+    "Liang-Barsky": liang_barsky,
+}
+
+
+def clip_segments(segments, rect, method="Liang-Barsky", stats=None):
+    """Отсекает отрезки и возвращает только видимые, с концами, округлёнными до пикселей.
+
+    Обрезанный отрезок растеризуется от округлённых концов со своим наклоном, поэтому его
+    пиксели могут отличаться от пикселей исходного отрезка в том же прямоугольнике; чтобы
+    вывести ровно их, нужен clip_steps.
+    """
+    seg, visible = CLIPPERS[method](segments, rect, stats)
+    return np.rint(seg[visible]).astype(np.int64)
+
+
+def clip_steps(segments, rect, method="Liang-Barsky", stats=None):
+    """Отсечение без изменения отрезков: видимая часть задаётся диапазоном шагов растеризации.
+
+    Возвращает видимые исходные отрезки (K, 4) и диапазоны (K, 2) — первый и последний шаг
+    по ведущей оси, отсчитанные от первого конца, для параметра ranges растеризаторов.
+    Диапазон берётся по прямоугольнику, расширенному на STEP_MARGIN, и покрывает все шаги,
+    пиксели которых могут попасть в rect; пиксели вне rect отбрасывает вызывающий.
+    В stats обрезанными считаются отрезки, у которых диапазон короче всего отрезка.
+    """
+    seg = as_segments(segments)
+    xmin, ymin, xmax, ymax = rect
+    wide = (xmin - STEP_MARGIN, ymin - STEP_MARGIN, xmax + STEP_MARGIN, ymax + STEP_MARGIN)
+    clipped, visible = CLIPPERS[method](seg, wide)
+    seg, clipped = seg[visible], clipped[visible]
+
+    # Ведущая ось — как в растеризаторах: y, если отрезок круче 45°
+    rows = np.arange(len(seg))
+    axis = (np.abs(seg[:, 3] - seg[:, 1]) > np.abs(seg[:, 2] - seg[:, 0])).astype(np.int64)
+    start = seg[rows, axis]
+    major = np.abs(seg[rows, axis + 2] - start)
+    a = np.abs(clipped[rows, axis] - start)
+    b = np.abs(clipped[rows, axis + 2] - start)
+    ranges = np.stack((np.floor(np.minimum(a, b)), np.ceil(np.maximum(a, b))), axis=1).astype(np.int64)
+    ranges = np.clip(ranges, 0, major[:, None])
+
+    if stats is not None:
+        trimmed = np.zeros(len(visible), dtype=bool)
+        trimmed[visible] = (ranges[:, 0] > 0) | (ranges[:, 1] < major)
+        stats.update(visible, trimmed)
+    return seg, ranges
+
+
+def clip_segments_near(starts, ends, near):
+    """Отсечение отрезков в пространстве камеры плоскостью z = near (остаётся часть с z >= near).
+
+    starts, ends (N, 3) — концы отрезков. Возвращает (начала, концы, маска видимых).
+    """
+    ahead_a, ahead_b = starts[:, 2] >= near, ends[:, 2] >= near
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (near - starts[:, 2]) / (ends[:, 2] - starts[:, 2])
+        hit = starts + t[:, None] * (ends - starts)
+    hit[:, 2] = near
+    starts = np.where(ahead_a[:, None], starts, hit)
+    ends = np.where(ahead_b[:, None], ends, hit)
+    return starts, ends, ahead_a | ahead_b
+
+
+def clip_polygons_near(vertices, indices, offsets, near):
+    """Отсечение многоугольников плоскостью z = near (алгоритм Сазерленда–Ходжмена для одной плоскости).
+
+    Многоугольник k задан номерами вершин indices[offsets[k]:offsets[k + 1]]. Возвращает
+    (точки (M, 3), границы (K + 1,)) — вершины обрезанных многоугольников подряд; у полностью
+    отсечённого многоугольника вершин не остаётся.
+    """
+    following = np.arange(1, len(indices) + 1)
+    following[offsets[1:] - 1] = offsets[:-1]
+    a, b = vertices[indices], vertices[indices[following]]
+    ahead_a, ahead_b = a[:, 2] >= near, b[:, 2] >= near
+    crossing = ahead_a != ahead_b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (near - a[:, 2]) / (b[:, 2] - a[:, 2])
+        hit = a + t[:, None] * (b - a)
+    hit[:, 2] = near
+
+    # Каждое ребро a -> b выдаёт a, если она перед плоскостью, и затем точку пересечения, если есть
+    emit = np.stack((ahead_a, crossing), axis=1)
+    points = np.stack((a, hit), axis=1)[emit]
+    counts = np.add.reduceat(emit.sum(axis=1), offsets[:-1]) if len(indices) else np.zeros(0, dtype=np.int64)
+    bounds = np.zeros(len(offsets), dtype=np.int64)
+    np.cumsum(counts, out=bounds[1:])
+    return points, bounds
@@ -0,0 +1,238 @@
+from functools import lru_cache
+
+import numpy as np
+
+from rasterizers import ragged_index, unique_pixels
+
+# Порядок отражений совпадает с циклами в lab2.py
+OCTANTS = [(1, 1, False), (1, 1, True), (-1, 1, False), (-1, 1, True),
+           (1, -1, False), (1, -1, True), (-1, -1, False), (-1, -1, True)]
+QUADRANTS = [(1, 1), (-1, 1), (1, -1), (-1, -1)]
+
+
+def _frozen(*arrays):
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays
+
+
+@lru_cache(maxsize=1024)
+def circle_octant(r):
+    """Точки одного октанта окружности радиуса r (алгоритм Брезенхема, как draw_circle в lab2.py)."""
+    xs, ys = [], []
+    x, y = 0, r
+    d = 3 - 2 * r
+    while x <= y:
+        xs.append(x)
+        ys.append(y)
+        if d < 0:
+            d += 4 * x + 6
+        else:
+            d += 4 * (x - y) + 10
+            y -= 1
+        x += 1
+    return _frozen(np.array(xs, dtype=np.int64), np.array(ys, dtype=np.int64))
+
+
+@lru_cache(maxsize=1024)
+def ellipse_quadrant(rx, ry):
+    """Точки одного квадранта эллипса (метод средней точки, как draw_ellipse в lab2.py)."""
+    xs, ys = [], []
+    x, y = 0, ry
+    d1 = ry**2 - rx**2 * ry + 0.25 * rx**2
+    dx, dy = 2 * ry**2 * x, 2 * rx**2 * y
+
+    while dx < dy:
+        xs.append(x)
+        ys.append(y)
+        if d1 < 0:
+            x += 1
+            dx += 2 * ry**2
+            d1 += dx + ry**2
+        else:
+            x += 1
+            y -= 1
+            dx += 2 * ry**2
+            dy -= 2 * rx**2
+            d1 += dx - dy + ry**2
+
+    d2 = ry**2 * (x + 0.5)**2 + rx**2 * (y - 1)**2 - rx**2 * ry**2
+    while y >= 0:
+        xs.append(x)
+        ys.append(y)
+        if d2 > 0:
+            y -= 1
+            dy -= 2 * rx**2
+            d2 += rx**2 - dy
+        else:
+            y -= 1
+            x += 1
+            dx += 2 * ry**2
+            dy -= 2 * rx**2
+            d2 += dx - dy + rx**2
+    return _frozen(np.array(xs, dtype=np.int64), np.array(ys, dtype=np.int64))
+
+
+def mirror_octants(xs, ys):
+    """Отражает точки октанта в 8 октантов; возвращает xs, ys и номер итерации каждой точки."""
+    out_x = np.empty((len(xs), 8), dtype=np.int64)
+    out_y = np.empty((len(xs), 8), dtype=np.int64)
+    for k, (sx, sy, swap) in enumerate(OCTANTS):
+        out_x[:, k] = sx * (ys if swap else xs)
+        out_y[:, k] = sy * (xs if swap else ys)
+    return out_x.ravel(), out_y.ravel(), np.repeat(np.arange(len(xs)), 8)
+
+
+def mirror_quadrants(xs, ys):
+    """Отражает точки квадранта в 4 квадранта; возвращает xs, ys и номер итерации каждой точки."""
+    out_x = np.empty((len(xs), 4), dtype=np.int64)
+    out_y = np.empty((len(xs), 4), dtype=np.int64)
+    for k, (sx, sy) in enumerate(QUADRANTS):
+        out_x[:, k] = sx * xs
+        out_y[:, k] = sy * ys
+    return out_x.ravel(), out_y.ravel(), np.repeat(np.arange(len(xs)), 4)
+
+
+@lru_cache(maxsize=1024)
+def circle_pattern(r):
+    """Все пиксели окружности радиуса r с центром в начале координат, без повторов."""
+    xs, ys, _ = mirror_octants(*circle_octant(r))
+    return _frozen(*unique_pixels(xs, ys))
+
+
+@lru_cache(maxsize=1024)
+def ellipse_pattern(rx, ry):
+    """Все пиксели эллипса с полуосями rx, ry и центром в начале координат, без повторов."""
+    xs, ys, _ = mirror_quadrants(*ellipse_quadrant(rx, ry))
+    return _frozen(*unique_pixels(xs, ys))
+
+
+def _place(patterns, keys, centers):
+    """Сдвигает шаблоны (по одному на уникальный ключ) в центры фигур."""
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    shapes = [patterns(*map(int, key)) for key in unique]
+    lengths = np.array([len(shape[0]) for shape in shapes], dtype=np.int64)
+    starts = np.cumsum(lengths) - lengths
+    all_x = np.concatenate([shape[0] for shape in shapes])
+    all_y = np.concatenate([shape[1] for shape in shapes])
+
+    figure, step = ragged_index(lengths[inverse])
+    index = starts[inverse[figure]] + step
+    return all_x[index] + centers[figure, 0], all_y[index] + centers[figure, 1]
+
+
+def circles(centers, radii):
+    """Пиксели набора окружностей: centers (N, 2), radii (N,). Возвращает плоские xs, ys.
+
+    Октант считается один раз на каждый различный радиус, остальное — операции над массивами.
+    """
+    centers = np.asarray(centers, dtype=np.int64).reshape(-1, 2)
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.int64), len(centers)).reshape(-1, 1)
+    if len(centers) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return _place(circle_pattern, radii, centers)
+
+
+def ellipses(centers, radii):
+    """Пиксели набора эллипсов: centers (N, 2), radii (N, 2) — полуоси rx, ry."""
+    centers = np.asarray(centers, dtype=np.int64).reshape(-1, 2)
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.int64), (len(centers), 2))
+    if len(centers) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return _place(ellipse_pattern, radii, centers)
+
+
+def hyperbola_quadrant(a, b, xmax, ymax):
+    """Точки ветви гиперболы x²/a² - y²/b² = 1 в первом квадранте, пока x <= xmax и y <= ymax.
+
+    Метод средней точки с целочисленной переменной решения F = b²x² - a²y² - a²b²
+    (умноженной на 4, чтобы средняя точка не давала дробей): у вершины кривая крутая
+    и шаг идёт по y, после точки b²x = a²y — по x. При a == 0 гипербола вырождается
+    в ось y.
+    """
+    if a == 0:
+        ys = np.arange(ymax + 1, dtype=np.int64)
+        return np.zeros_like(ys), ys
+    a2, b2 = a * a, b * b
+    xs, ys = [], []
+    x, y = a, 0
+    # Область 1: шаг по y, средняя точка (x + 1/2, y + 1)
+    d = b2 * (2 * x + 1) ** 2 - 4 * a2 * (y + 1) ** 2 - 4 * a2 * b2
+    while a2 * y < b2 * x and x <= xmax and y <= ymax:
+        xs.append(x)
+        ys.append(y)
+        if d < 0:
+            d += 8 * b2 * (x + 1)
+            x += 1
+        d -= 4 * a2 * (2 * y + 3)
+        y += 1
+
+    # Область 2: шаг по x, средняя точка (x + 1, y + 1/2)
+    d = 4 * b2 * (x + 1) ** 2 - a2 * (2 * y + 1) ** 2 - 4 * a2 * b2
+    while x <= xmax and y <= ymax:
+        xs.append(x)
+        ys.append(y)
+        if d > 0:
+            d -= 8 * a2 * (y + 1)
+            y += 1
+        d += 4 * b2 * (2 * x + 3)
+        x += 1
+    return np.array(xs, dtype=np.int64), np.array(ys, dtype=np.int64)
+
+
+def parabola_quadrant(p, xmax, ymax):
+    """Точки параболы x² = 2py в первом квадранте, пока x <= xmax и y <= ymax.
+
+    До x = p кривая пологая и шаг идёт по x, дальше — по y; переменная решения
+    F = x² - 2py целочисленная. При p == 0 парабола вырождается в луч по оси y.
+    """
+    xs, ys = [], []
+    x, y = 0, 0
+    # Область 1: шаг по x, средняя точка (x + 1, y + 1/2)
+    d = (x + 1) ** 2 - p * (2 * y + 1)
+    while x < p and x <= xmax and y <= ymax:
+        xs.append(x)
+        ys.append(y)
+        if d > 0:
+            d -= 2 * p
+            y += 1
+        d += 2 * x + 3
+        x += 1
+
+    # Область 2: шаг по y, средняя точка (x + 1/2, y + 1), умножено на 4
+    d = (2 * x + 1) ** 2 - 8 * p * (y + 1)
+    while x <= xmax and y <= ymax:
+        xs.append(x)
+        ys.append(y)
+        if d < 0:
+            d += 8 * (x + 1)
+            x += 1
+        d -= 8 * p
+        y += 1
+    return np.array(xs, dtype=np.int64), np.array(ys, dtype=np.int64)
+
+
+def row_spans(xs, ys):
+    """Горизонтальные отрезки заливки: по строке на каждое y от крайнего левого до крайнего правого пикселя контура.
+
+    Возвращает (x, y, длина), как pixels_to_spans; для выпуклой фигуры это её заливка.
+    """
+    xs, ys = unique_pixels(xs, ys)
+    if len(xs) == 0:
+        return xs, ys, xs
+    first = np.ones(len(ys), dtype=bool)
+    first[1:] = ys[1:] != ys[:-1]
+    starts = np.nonzero(first)[0]
+    x0 = xs[starts]
+    return x0, ys[starts], np.maximum.reduceat(xs, starts) - x0 + 1
+
+
+def circle_spans(r):
+    """Заливка круга радиуса r с центром в начале координат строками (x, y, длина)."""
+    return row_spans(*circle_pattern(r))
+
+
+def ellipse_spans(rx, ry):
+    """Заливка эллипса с полуосями rx, ry строками (x, y, длина)."""
+    return row_spans(*ellipse_pattern(rx, ry))
@@ -0,0 +1,74 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from trace_table import TraceRecorder
+
+# Этапы кадра lab4.py в порядке выполнения
+STAGES = ("matrix", "transform", "projection", "culling", "drawing")
+PERCENTILES = (50, 95, 99)
+
+
+class FrameTimer:
+    """Время этапов каждого кадра (мс) в кольцевом буфере и скользящие перцентили.
+
+    Этапы кадра накапливаются вызовами stage()/add() и записываются строкой при end_frame();
+    этап может выполняться в другом потоке (матрица собирается в потоке GUI), поэтому
+    накопление и запись идут под блокировкой. Перцентили считаются по последним window кадрам.
+    """
+
+    def __init__(self, stages=STAGES, capacity=100000, window=300):
+        self.stages = list(stages)
+        self.window = window
+        self.frames = 0
+        self.lock = threading.Lock()
+        self.pending = dict.fromkeys(self.stages, 0.0)
+        columns = ["frame", "level", "faces"] + [f"{stage}_ms" for stage in self.stages] + ["total_ms"]
+        formats = [".0f", ".0f", ".0f"] + [".3f"] * (len(self.stages) + 1)
+        self.recorder = TraceRecorder(columns, capacity, formats)
+
+    def __len__(self):
+        return len(self.recorder)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        with self.lock:
+            self.pending[name] += seconds
+
+    def end_frame(self, level=0, faces=0):
+        """Записывает накопленное время этапов как очередной кадр."""
+        with self.lock:
+            times = [self.pending[stage] * 1000 for stage in self.stages]
+            self.pending = dict.fromkeys(self.stages, 0.0)
+            self.recorder.append(self.frames, level, faces, *times, sum(times))
+            self.frames += 1
+
+    def percentiles(self, q=PERCENTILES):
+        """Перцентили времени этапов и всего кадра (мс): массив (len(q), число этапов + 1)."""
+        with self.lock:
+            count = len(self.recorder)
+            times = self.recorder.rows(max(count - self.window, 0), count)[:, 3:]
+        if len(times) == 0:
+            return np.full((len(q), len(self.stages) + 1), np.nan)
+        return np.percentile(times, q, axis=0)
+
+    def summary(self, q=PERCENTILES):
+        """Строки таблицы перцентилей для вывода поверх кадра."""
+        values = self.percentiles(q)
+        lines = [f"{'ms':<11}" + "".join(f"{f'p{p}':>8}" for p in q)]
+        for name, column in zip(self.stages + ["total"], values.T):
+            lines.append(f"{name:<11}" + "".join(f"{value:8.2f}" for value in column))
+        return lines
+
+    def to_csv(self, filename):
+        with self.lock:
+            self.recorder.to_csv(filename)
@@ -0,0 +1,136 @@
+import tkinter as tk
+import numpy as np
+
+from rasterizers import intensity_lut, coverage_to_rgb, accumulate_coverage
+
+# Цвета элементов холста по уровню покрытия 0..255 (0 — белый, 255 — чёрный),
+# чтобы не форматировать строку цвета для каждого пикселя
+INTENSITY_COLORS = [f"#{255 - level:02x}{255 - level:02x}{255 - level:02x}" for level in range(256)]
+
+
+def intensity_color(c):
+    """Цвет пикселя с покрытием c (0..1) из таблицы INTENSITY_COLORS."""
+    return INTENSITY_COLORS[min(max(int(c * 255 + 0.5), 0), 255)]
+
+
+class FrameBuffer:
+    """Буфер кадра, выводимый на холст одним PhotoImage.
+
+    Алгоритмы накапливают покрытие пикселей в массиве float32; раз в кадр изменившийся
+    прямоугольник (dirty rectangle) переводится в цвета uint8 по таблице из 256 значений
+    и копируется на холст, поэтому число элементов Tk не зависит от числа линий.
+    """
+
+    def __init__(self, canvas, width, height, background=255, composite="max"):
+        self.canvas = canvas
+        self.background = background
+        self.composite = composite
+        self.lut = intensity_lut(background=(background, background, background))
+        self.coverage = np.zeros((height, width), dtype=np.float32)
+        self.pixels = np.full((height, width, 3), background, dtype=np.uint8)
+        self.image = tk.PhotoImage(width=width, height=height)
+        self.image_id = canvas.create_image(0, 0, image=self.image, anchor=tk.NW, tags="framebuffer")
+        canvas.tag_lower(self.image_id)
+        self.dirty = None
+        self.mark_dirty(0, 0, width, height)
+        self.blit()
+
+    @property
+    def width(self):
+        return self.pixels.shape[1]
+
+    @property
+    def height(self):
+        return self.pixels.shape[0]
+
+    def mark_dirty(self, x0, y0, x1, y1):
+        # Прямоугольник задаётся полуинтервалами [x0, x1) x [y0, y1)
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.width), min(y1, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        if self.dirty is None:
+            self.dirty = (x0, y0, x1, y1)
+        else:
+            dx0, dy0, dx1, dy1 = self.dirty
+            self.dirty = (min(dx0, x0), min(dy0, y0), max(dx1, x1), max(dy1, y1))
+
+    def set_pixel(self, x, y, c=1.0):
+        """Записывает покрытие пикселя без смешивания (1 — цвет линии)."""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.coverage[y, x] = c
+            self.mark_dirty(x, y, x + 1, y + 1)
+
+    def put_pixels(self, xs, ys, c=1.0):
+        """Векторная запись покрытия; точки за пределами буфера отбрасываются."""
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        c = np.broadcast_to(np.asarray(c, dtype=np.float32), xs.shape)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        if not inside.any():
+            return
+        xs, ys = xs[inside], ys[inside]
+        self.coverage[ys, xs] = c[inside]
+        self.mark_dirty(int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1)
+
+    def fill_spans(self, xs, ys, lengths, c=1.0):
+        """Заливает горизонтальные серии [x, x + length) в строках y; по срезу на серию."""
+        x0 = np.clip(np.asarray(xs, dtype=np.int64), 0, self.width)
+        x1 = np.clip(np.asarray(xs, dtype=np.int64) + lengths, 0, self.width)
+        ys = np.asarray(ys, dtype=np.int64)
+        visible = (x0 < x1) & (ys >= 0) & (ys < self.height)
+        if not visible.any():
+            return
+        x0, x1, ys = x0[visible], x1[visible], ys[visible]
+        for y, a, b in zip(ys.tolist(), x0.tolist(), x1.tolist()):
+            self.coverage[y, a:b] = c
+        self.mark_dirty(int(x0.min()), int(ys.min()), int(x1.max()), int(ys.max()) + 1)
+
+    def accumulate(self, xs, ys, c):
+        """Смешивает покрытие со значениями буфера (режим self.composite: "max" или "add")."""
+        if np.ndim(xs) == 0:
+            if 0 <= xs < self.width and 0 <= ys < self.height:
+                if self.composite == "add":
+                    self.coverage[ys, xs] = min(self.coverage[ys, xs] + c, 1.0)
+                else:
+                    self.coverage[ys, xs] = max(self.coverage[ys, xs], c)
+                self.mark_dirty(xs, ys, xs + 1, ys + 1)
+            return
+        area = accumulate_coverage(self.coverage, xs, ys, c, self.composite)
+        if area is not None:
+            self.mark_dirty(*area)
+
+    def clear(self):
+        self.coverage[:] = 0
+        self.mark_dirty(0, 0, self.width, self.height)
+
+    def resize(self, width, height):
+        if (width, height) == (self.width, self.height):
+            return
+        coverage = np.zeros((height, width), dtype=np.float32)
+        h, w = min(height, self.height), min(width, self.width)
+        coverage[:h, :w] = self.coverage[:h, :w]
+        self.coverage = coverage
+        self.pixels = np.full((height, width, 3), self.background, dtype=np.uint8)
+        self.image.configure(width=width, height=height)
+        self.dirty = None
+        self.mark_dirty(0, 0, width, height)
+
+    def resolve(self):
+        """Переводит покрытие изменившейся области в цвета по таблице."""
+        if self.dirty is None:
+            return
+        x0, y0, x1, y1 = self.dirty
+        self.pixels[y0:y1, x0:x1] = coverage_to_rgb(self.coverage[y0:y1, x0:x1], self.lut)
+
+    def blit(self):
+        """Переносит изменившийся прямоугольник на холст."""
+        if self.dirty is None:
+            return
+        self.resolve()
+        x0, y0, x1, y1 = self.dirty
+        region = np.ascontiguousarray(self.pixels[y0:y1, x0:x1])
+        header = f"P6 {x1 - x0} {y1 - y0} 255\n".encode("ascii")
+        patch = tk.PhotoImage(width=x1 - x0, height=y1 - y0, data=header + region.tobytes(), format="PPM")
+        self.image.tk.call(self.image, "copy", patch, "-to", x0, y0)
+        self.dirty = None
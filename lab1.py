@@ -1,5 +1,15 @@
+import time
 import tkinter as tk
 from tkinter import ttk, Menu
+from framebuffer import FrameBuffer, intensity_color
+from trace_table import TraceRecorder, TraceView
+from clipping import ClipStats, clip_steps
+from rasterizers import pixels_to_spans
+
+# Максимальное число строк отладочной таблицы, хранимых в памяти
+TRACE_CAPACITY = 100000
+
+ALGORITHMS = ["CDA", "Integer CDA (exact)", "Bresenham", "Symmetric Bresenham", "Double-step Bresenham", "Wu"]
 
 
 class LineEditor(tk.Tk):
@@ -14,6 +24,18 @@ class LineEditor(tk.Tk):
         self.start_x = self.start_y = None
         self.end_x = self.end_y = None
         self.algorithm = "CDA"
+        self.backend = "Canvas"
+        self.framebuffer = None
+        self.clip_method = "Liang-Barsky"
+        self.clip_stats = ClipStats()
+        # Первый и последний шаг текущего отрезка по ведущей оси, попадающие на холст
+        self.visible_steps = None
+
+        # Пиксели, накопленные для вывода сериями, и общая вершина ломаной
+        self.pending_pixels = []
+        self.shared_vertex = None
+        self.polyline_active = False
+        self.draw_time = 0.0
 
         self.create_menu()
         self.create_toolbar()
@@ -21,6 +43,8 @@ class LineEditor(tk.Tk):
 
         self.canvas.bind("<Button-1>", self.start_draw)
         self.canvas.bind("<ButtonRelease-1>", self.end_draw)
+        self.canvas.bind("<Button-3>", self.finish_polyline)
+        self.canvas.bind("<Configure>", self.resize_framebuffer)
 
     def create_menu(self):
         menu_bar = Menu(self)
@@ -28,10 +52,26 @@ class LineEditor(tk.Tk):
 
         algo_menu = Menu(menu_bar, tearoff=0)
         algo_menu.add_command(label="ЦДА", command=lambda: self.set_algorithm("CDA"))
+        algo_menu.add_command(label="Целочисленный ЦДА (точная арифметика)",
+                              command=lambda: self.set_algorithm("Integer CDA (exact)"))
         algo_menu.add_command(label="Брезенхем", command=lambda: self.set_algorithm("Bresenham"))
+        algo_menu.add_command(label="Симметричный Брезенхем",
+                              command=lambda: self.set_algorithm("Symmetric Bresenham"))
+        algo_menu.add_command(label="Брезенхем с двойным шагом",
+                              command=lambda: self.set_algorithm("Double-step Bresenham"))
         algo_menu.add_command(label="Ву", command=lambda: self.set_algorithm("Wu"))
         menu_bar.add_cascade(label="Алгоритм", menu=algo_menu)
 
+        backend_menu = Menu(menu_bar, tearoff=0)
+        backend_menu.add_command(label="Элементы холста", command=lambda: self.set_backend("Canvas"))
+        backend_menu.add_command(label="Буфер кадра", command=lambda: self.set_backend("Framebuffer"))
+        menu_bar.add_cascade(label="Вывод", menu=backend_menu)
+
+        clip_menu = Menu(menu_bar, tearoff=0)
+        clip_menu.add_command(label="Коэн-Сазерленд", command=lambda: self.set_clip_method("Cohen-Sutherland"))
+        clip_menu.add_command(label="Лянг-Барски", command=lambda: self.set_clip_method("Liang-Barsky"))
+        menu_bar.add_cascade(label="Отсечение", menu=clip_menu)
+
     def create_toolbar(self):
         toolbar = ttk.Frame(self, padding=5)
         toolbar.pack(fill=tk.X)
@@ -39,11 +79,23 @@ class LineEditor(tk.Tk):
         ttk.Label(toolbar, text="Алгоритм: ").pack(side=tk.LEFT)
 
         self.algo_var = tk.StringVar(value=self.algorithm)
-        algo_selector = ttk.Combobox(toolbar, textvariable=self.algo_var, values=["CDA", "Bresenham", "Wu"],
-                                     state="readonly")
+        algo_selector = ttk.Combobox(toolbar, textvariable=self.algo_var, values=ALGORITHMS,
+                                     state="readonly", width=22)
         algo_selector.pack(side=tk.LEFT)
         algo_selector.bind("<<ComboboxSelected>>", lambda e: self.set_algorithm(algo_selector.get()))
 
+        ttk.Label(toolbar, text="Вывод: ").pack(side=tk.LEFT, padx=(10, 0))
+        self.backend_var = tk.StringVar(value=self.backend)
+        backend_selector = ttk.Combobox(toolbar, textvariable=self.backend_var, values=["Canvas", "Framebuffer"],
+                                        state="readonly")
+        backend_selector.pack(side=tk.LEFT)
+        backend_selector.bind("<<ComboboxSelected>>", lambda e: self.set_backend(backend_selector.get()))
+
+        self.spans_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(toolbar, text="Серии", variable=self.spans_var).pack(side=tk.LEFT, padx=(10, 0))
+        self.polyline_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(toolbar, text="Ломаная (ПКМ — завершить)", variable=self.polyline_var).pack(side=tk.LEFT)
+
     def create_debug_panel(self):
         self.debug_frame = ttk.Frame(self, padding=5)
         self.debug_frame.pack(fill=tk.X, side=tk.BOTTOM)
@@ -51,13 +103,20 @@ class LineEditor(tk.Tk):
         self.debug_label = ttk.Label(self.debug_frame, text="Отладка: Ожидание ввода точек")
         self.debug_label.pack()
 
-        self.debug_text = tk.Text(self.debug_frame, height=10, state=tk.DISABLED)
-        self.debug_text.pack(fill=tk.BOTH, expand=True)
+        self.trace = TraceRecorder(["Итерация", "X", "Y"], capacity=TRACE_CAPACITY)
+        self.trace_view = TraceView(self.debug_frame, self.trace, height=10)
+        self.trace_view.pack(fill=tk.BOTH, expand=True)
 
-    def log_debug(self, text):
-        self.debug_text.config(state=tk.NORMAL)
-        self.debug_text.insert(tk.END, text + "\n")
-        self.debug_text.config(state=tk.DISABLED)
+        ttk.Button(self.debug_frame, text="Экспорт CSV", command=self.trace_view.export_csv).pack(anchor=tk.E)
+
+    def show_trace(self):
+        text = f"Отладка: {self.algorithm}, {self.draw_time * 1000:.2f} мс, {len(self.trace)} строк"
+        if self.trace.dropped:
+            text += f" (старых отброшено: {self.trace.dropped})"
+        text += f". Отсечение: {self.clip_stats}"
+        self.debug_label.config(text=text)
+        self.trace_view.first = 0
+        self.trace_view.refresh()
 
     def transform_y(self, y):
         return self.canvas.winfo_height() - y
@@ -66,25 +125,111 @@ class LineEditor(tk.Tk):
         self.algorithm = algo
         self.algo_var.set(algo)
 
+    def set_clip_method(self, method):
+        self.clip_method = method
+
+    def set_backend(self, backend):
+        self.backend = backend
+        self.backend_var.set(backend)
+        if backend == "Framebuffer" and self.framebuffer is None:
+            self.framebuffer = FrameBuffer(self.canvas, self.canvas.winfo_width(), self.canvas.winfo_height())
+
+    def resize_framebuffer(self, event):
+        if self.framebuffer is not None:
+            self.framebuffer.resize(event.width, event.height)
+            self.framebuffer.blit()
+
+    def plot(self, x, y):
+        if self.shared_vertex == (int(x), int(y)):
+            return
+        if self.backend == "Framebuffer":
+            self.framebuffer.set_pixel(int(x), self.transform_y(int(y)))
+        elif self.spans_var.get():
+            self.pending_pixels.append((int(x), self.transform_y(int(y))))
+        else:
+            self.canvas.create_oval(x, self.transform_y(y), x + 1, self.transform_y(y) + 1, fill="black")
+
+    def draw_spans(self):
+        """Выводит накопленные пиксели сериями: один прямоугольник на строку или столбец."""
+        if not self.pending_pixels:
+            return
+        xs, ys = zip(*self.pending_pixels)
+        self.pending_pixels = []
+        vertical = abs(self.end_y - self.start_y) > abs(self.end_x - self.start_x)
+        for x, y, length in zip(*pixels_to_spans(xs, ys, vertical)):
+            if vertical:
+                self.canvas.create_rectangle(x, y, x + 1, y + length, fill="black", outline="")
+            else:
+                self.canvas.create_rectangle(x, y, x + length, y + 1, fill="black", outline="")
+
+    def plot_wu(self, x, y, c):
+        if self.shared_vertex == (x, y):
+            return
+        if self.backend == "Framebuffer":
+            self.framebuffer.accumulate(x, self.transform_y(y), c)
+        else:
+            self.canvas.create_oval(x, self.transform_y(y), x + 1, self.transform_y(y) + 1,
+                                    fill=intensity_color(c), outline="")
+
     def start_draw(self, event):
-        self.start_x, self.start_y = event.x, self.transform_y(event.y)
+        if self.polyline_var.get() and self.polyline_active:
+            # Следующее звено ломаной начинается в конце предыдущего, общая вершина не рисуется повторно
+            self.start_x, self.start_y = self.end_x, self.end_y
+            self.shared_vertex = (self.start_x, self.start_y)
+        else:
+            self.start_x, self.start_y = event.x, self.transform_y(event.y)
+            self.shared_vertex = None
 
     def end_draw(self, event):
         self.end_x, self.end_y = event.x, self.transform_y(event.y)
         self.draw_line()
+        self.polyline_active = self.polyline_var.get()
 
-    def draw_line(self):
-        self.debug_text.config(state=tk.NORMAL)
-        self.debug_text.delete(1.0, tk.END)
-        self.debug_text.config(state=tk.DISABLED)
+    def finish_polyline(self, event=None):
+        self.polyline_active = False
+        self.shared_vertex = None
+
+    def clip_to_canvas(self):
+        """Диапазон шагов отрезка, видимых на холсте (см. clipping.clip_steps); None, если он весь снаружи.
+
+        Концы отрезка не меняются: алгоритмы проходят исходный отрезок и выводят только шаги
+        из диапазона, поэтому видимые пиксели те же, что без отсечения.
+        """
+        rect = (0, 1, self.canvas.winfo_width() - 1, self.canvas.winfo_height())
+        segments, ranges = clip_steps([self.start_x, self.start_y, self.end_x, self.end_y], rect,
+                                      self.clip_method, self.clip_stats)
+        if len(segments) == 0:
+            return None
+        return tuple(map(int, ranges[0]))
+
+    def is_visible(self, step):
+        first, last = self.visible_steps
+        return first <= step <= last
 
-        if self.algorithm == "CDA":
+    def draw_line(self):
+        started = time.perf_counter()
+        self.visible_steps = self.clip_to_canvas()
+        if self.visible_steps is None:
+            self.trace.clear()
+        elif self.algorithm == "CDA":
             self.draw_cda()
+        elif self.algorithm == "Integer CDA (exact)":
+            self.draw_int_cda()
         elif self.algorithm == "Bresenham":
             self.draw_bresenham()
+        elif self.algorithm == "Symmetric Bresenham":
+            self.draw_bresenham_symmetric()
+        elif self.algorithm == "Double-step Bresenham":
+            self.draw_bresenham_double()
         elif self.algorithm == "Wu":
             self.draw_wu()
 
+        self.draw_spans()
+        self.draw_time = time.perf_counter() - started
+        if self.backend == "Framebuffer":
+            self.framebuffer.blit()
+        self.show_trace()
+
     def draw_cda(self):
         dx = self.end_x - self.start_x
         dy = self.end_y - self.start_y
@@ -93,12 +238,14 @@ class LineEditor(tk.Tk):
         y_inc = dy / steps
         x, y = self.start_x, self.start_y
 
-        self.log_debug(f"Итерация\tX\tY\tPlot(X, Y)")
-        self.log_debug(f"-----------------------------------------------------------------")
+        self.trace.reset(["Итерация", "X", "Y", "Plot X", "Plot Y"], [".0f", ".2f", ".2f", ".0f", ".0f"])
 
-        for i in range(steps + 1):
-            self.canvas.create_oval(x, self.transform_y(y), x + 1, self.transform_y(y) + 1, fill="black")
-            self.log_debug(f"{i}\t{x:.2f}\t{y:.2f}\t({int(x)}, {int(y)})")
+        # Шаги до видимой части только накапливают координаты
+        first, last = self.visible_steps
+        for i in range(last + 1):
+            if i >= first:
+                self.plot(x, y)
+                self.trace.append(i, x, y, int(x), int(y))
             x += x_inc
             y += y_inc
 
@@ -115,17 +262,14 @@ class LineEditor(tk.Tk):
 
         e = 2 * dy - dx
 
-        self.log_debug(f"Итерация\tОшибка e\tX\tY\tКорр. ошибка e'\tPlot(X, Y)")
-        self.log_debug(f"-----------------------------------------------------------------")
-
-        for i in range(dx + 1):
-            self.canvas.create_oval(x1, self.transform_y(y1), x1 + 1, self.transform_y(y1) + 1, fill="black")
+        self.trace.reset(["Итерация", "Ошибка e", "X", "Y", "Корр. ошибка e'"], [".0f"] * 5)
+        prev_e = float("nan")
 
-
-            if i == 0:
-                self.log_debug(f"{i}\t---\t{x1}\t{y1}\t---\t({x1}, {y1})")
-            else:
-                self.log_debug(f"{i}\t{prev_e}\t{x1}\t{y1}\t{e}\t({x1}, {y1})")
+        first, last = self.visible_steps
+        for i in range(last + 1):
+            if i >= first:
+                self.plot(x1, y1)
+                self.trace.append(i, prev_e, x1, y1, e if i else float("nan"))
 
             prev_e = e
 
@@ -142,11 +286,142 @@ class LineEditor(tk.Tk):
                 x1 += sx
             e += 2 * dy
 
-    def draw_wu(self):
-        def plot(x, y, c):
-            color = f"#{int(255 * (1 - c)):02x}{int(255 * (1 - c)):02x}{int(255 * (1 - c)):02x}"
-            self.canvas.create_oval(x, self.transform_y(y), x + 1, self.transform_y(y) + 1, fill=color, outline="")
+    def draw_int_cda(self):
+        # ЦДА на целых числах: дробная часть координаты хранится как остаток со знаменателем steps,
+        # и пиксель равен floor(x1 + i * dx / steps) — точному рациональному значению, округлённому вниз.
+        # В draw_cda сумма приращений с плавающей точкой накапливает ошибку, и пиксели могут отличаться
+        x, y = self.start_x, self.start_y
+        dx = self.end_x - self.start_x
+        dy = self.end_y - self.start_y
+        steps = max(abs(dx), abs(dy))
+        sx = 1 if dx >= 0 else -1
+        sy = 1 if dy >= 0 else -1
+        adx, ady = abs(dx), abs(dy)
+
+        # При движении в отрицательную сторону int() даёт округление вверх по модулю шага
+        rx = 0 if sx > 0 else steps - 1
+        ry = 0 if sy > 0 else steps - 1
+
+        self.trace.reset(["Итерация", "X", "Y", "Остаток X", "Остаток Y"], [".0f"] * 5)
+
+        first, last = self.visible_steps
+        for i in range(last + 1):
+            if i >= first:
+                self.plot(x, y)
+                self.trace.append(i, x, y, rx, ry)
+            rx += adx
+            if rx >= steps:
+                rx -= steps
+                x += sx
+            ry += ady
+            if ry >= steps:
+                ry -= steps
+                y += sy
+
+    def draw_bresenham_symmetric(self):
+        # Брезенхем с генерацией с двух концов: за итерацию выводятся пиксели i и dx - i.
+        # Ошибка общая для обоих концов; при e == 0 (точная середина) прямой проход шагает
+        # по ведомой оси сразу, а обратный — на итерацию позже, чтобы пиксели совпали
+        x1, y1, x2, y2 = self.start_x, self.start_y, self.end_x, self.end_y
+        dx = abs(x2 - x1)
+        dy = abs(y2 - y1)
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
 
+        is_steep = dy > dx
+        if is_steep:
+            dx, dy = dy, dx
+
+        e = 2 * dy - dx
+        prev_e = None
+
+        self.trace.reset(["Итерация", "Ошибка e", "X", "Y", "X с конца", "Y с конца"], [".0f"] * 6)
+
+        for i in range(dx // 2 + 1):
+            forward = self.is_visible(i)
+            backward = 2 * i != dx and self.is_visible(dx - i)
+            if forward:
+                self.plot(x1, y1)
+            if backward:
+                self.plot(x2, y2)
+            if forward or backward:
+                self.trace.append(i, e, x1, y1, x2, y2)
+
+            back_step = e > 0 or prev_e == 0
+            if is_steep:
+                y1 += sy
+                y2 -= sy
+                if e >= 0:
+                    x1 += sx
+                if back_step:
+                    x2 -= sx
+            else:
+                x1 += sx
+                x2 -= sx
+                if e >= 0:
+                    y1 += sy
+                if back_step:
+                    y2 -= sy
+            prev_e = e
+            if e >= 0:
+                e -= 2 * dx
+            e += 2 * dy
+
+    def draw_bresenham_double(self):
+        # Брезенхем с двойным шагом: одно решение по ошибке e выбирает один из
+        # шаблонов для двух следующих пикселей (00, 01, 10, 11 — шаги по ведомой оси)
+        x, y = self.start_x, self.start_y
+        dx = abs(self.end_x - x)
+        dy = abs(self.end_y - y)
+        sx = 1 if x < self.end_x else -1
+        sy = 1 if y < self.end_y else -1
+
+        is_steep = dy > dx
+        if is_steep:
+            dx, dy = dy, dx
+        # Шаги вдоль ведущей (major) и ведомой (minor) осей
+        major = (0, sy) if is_steep else (sx, 0)
+        minor = (sx, 0) if is_steep else (0, sy)
+
+        e = 2 * dy - dx
+        inc_00 = 4 * dy
+        inc_01 = 4 * dy - 2 * dx
+        inc_11 = 4 * dy - 4 * dx
+
+        self.trace.reset(["Итерация", "Ошибка e", "X", "Y", "Шаблон"], [".0f", ".0f", ".0f", ".0f", "02.0f"])
+
+        if self.is_visible(0):
+            self.plot(x, y)
+        for i in range(dx // 2):
+            if 2 * i + 1 > self.visible_steps[1]:
+                return
+            if e < 0:
+                first = 0
+                second = 0 if e < -2 * dy else 1
+            else:
+                first = 1
+                second = 0 if e < 2 * dx - 2 * dy else 1
+            if self.is_visible(2 * i + 1) or self.is_visible(2 * i + 2):
+                self.trace.append(i, e, x, y, 10 * first + second)
+
+            x += major[0] + first * minor[0]
+            y += major[1] + first * minor[1]
+            if self.is_visible(2 * i + 1):
+                self.plot(x, y)
+            x += major[0] + second * minor[0]
+            y += major[1] + second * minor[1]
+            if self.is_visible(2 * i + 2):
+                self.plot(x, y)
+
+            e += inc_11 if first + second == 2 else inc_01 if first + second == 1 else inc_00
+
+        if dx % 2 and self.is_visible(dx):
+            # Нечётное число шагов: последний пиксель обычным шагом Брезенхема
+            x += major[0] + (e >= 0) * minor[0]
+            y += major[1] + (e >= 0) * minor[1]
+            self.plot(x, y)
+
+    def draw_wu(self):
         x1, y1, x2, y2 = self.start_x, self.start_y, self.end_x, self.end_y
         dx = x2 - x1
         dy = y2 - y1
@@ -154,28 +429,32 @@ class LineEditor(tk.Tk):
         if steep:
             x1, y1 = y1, x1
             x2, y2 = y2, x2
+        # Видимые шаги отсчитаны от первого конца; после перестановки концов — от второго
+        first, last = self.visible_steps
         if x1 > x2:
             x1, x2 = x2, x1
             y1, y2 = y2, y1
+            first, last = x2 - x1 - last, x2 - x1 - first
         dx = x2 - x1
         dy = y2 - y1
         gradient = dy / dx if dx != 0 else 1
         y = y1
 
-        self.debug_text.config(state=tk.NORMAL)
-        self.debug_text.delete(1.0, tk.END)
-        self.debug_text.insert(tk.END, "Итерация\tX\tY\tИнтенсивность\n")
-        self.debug_text.insert(tk.END, "--------------------------------\n")
-
-        for i, x in enumerate(range(x1, x2 + 1)):
-            intensity1 = 1 - (y - int(y))
-            intensity2 = y - int(y)
-            plot(x, int(y), intensity1)
-            plot(x, int(y) + 1, intensity2)
-            self.log_debug(f"{i}\t{x}\t{int(y)}\t{intensity1:.2f}")
-            y += gradient
+        self.trace.reset(["Итерация", "X", "Y", "Интенсивность"], [".0f", ".0f", ".0f", ".2f"])
 
-        self.debug_text.config(state=tk.DISABLED)
+        for i, x in enumerate(range(x1, x1 + last + 1)):
+            if i >= first:
+                intensity1 = 1 - (y - int(y))
+                intensity2 = y - int(y)
+                # У крутого отрезка оси были переставлены; пиксели выводятся в координатах холста
+                if steep:
+                    self.plot_wu(int(y), x, intensity1)
+                    self.plot_wu(int(y) + 1, x, intensity2)
+                else:
+                    self.plot_wu(x, int(y), intensity1)
+                    self.plot_wu(x, int(y) + 1, intensity2)
+                self.trace.append(i, x, int(y), intensity1)
+            y += gradient
 
 
 if __name__ == "__main__":
@@ -1,6 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, Menu
-import math
+from trace_table import TraceRecorder, TraceView
+from conics import (circle_octant, circle_pattern, circle_spans, ellipse_quadrant, ellipse_pattern, ellipse_spans,
+                    hyperbola_quadrant, parabola_quadrant, mirror_octants, mirror_quadrants)
+from rasterizers import unique_pixels
+from framebuffer import FrameBuffer
+
+# Максимальное число строк таблицы итераций, хранимых в памяти
+TABLE_CAPACITY = 200000
 
 
 class LineEditor(tk.Tk):
@@ -16,6 +23,8 @@ class LineEditor(tk.Tk):
         self.end_x = self.end_y = None
         self.algorithm = "CDA"
         self.curve_type = "Circle"
+        self.backend = "Canvas"
+        self.framebuffer = None
 
         self.create_menu()
         self.create_toolbar()
@@ -23,6 +32,7 @@ class LineEditor(tk.Tk):
 
         self.canvas.bind("<Button-1>", self.start_draw)
         self.canvas.bind("<ButtonRelease-1>", self.end_draw)
+        self.canvas.bind("<Configure>", self.resize_framebuffer)
 
     def create_menu(self):
         menu_bar = Menu(self)
@@ -41,6 +51,11 @@ class LineEditor(tk.Tk):
         curve_menu.add_command(label="Парабола", command=lambda: self.set_curve("Parabola"))
         menu_bar.add_cascade(label="Линии второго порядка", menu=curve_menu)
 
+        backend_menu = Menu(menu_bar, tearoff=0)
+        backend_menu.add_command(label="Элементы холста", command=lambda: self.set_backend("Canvas"))
+        backend_menu.add_command(label="Буфер кадра", command=lambda: self.set_backend("Framebuffer"))
+        menu_bar.add_cascade(label="Вывод", menu=backend_menu)
+
     def create_toolbar(self):
         toolbar = ttk.Frame(self, padding=5)
         toolbar.pack(fill=tk.X)
@@ -58,17 +73,30 @@ class LineEditor(tk.Tk):
         curve_selector.pack(side=tk.LEFT)
         curve_selector.bind("<<ComboboxSelected>>", lambda e: self.set_curve(curve_selector.get()))
 
+        ttk.Label(toolbar, text="Вывод: ").pack(side=tk.LEFT)
+        self.backend_var = tk.StringVar(value=self.backend)
+        backend_selector = ttk.Combobox(toolbar, textvariable=self.backend_var, values=["Canvas", "Framebuffer"],
+                                        state="readonly")
+        backend_selector.pack(side=tk.LEFT)
+        backend_selector.bind("<<ComboboxSelected>>", lambda e: self.set_backend(backend_selector.get()))
+
+        self.fill_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(toolbar, text="Заливка", variable=self.fill_var).pack(side=tk.LEFT, padx=(10, 0))
+
     def create_table(self):
         self.table_frame = ttk.Frame(self)
         self.table_frame.pack(fill=tk.BOTH, expand=True, side=tk.BOTTOM)
 
-        columns = ["Итерация", "X", "Y", "Plot(X,Y)"]
-        self.table = ttk.Treeview(self.table_frame, columns=columns, show="headings")
-        self.table.pack(fill=tk.BOTH, expand=True)
+        # Строки хранятся по колонкам в памяти, а в виджет выводятся только видимые
+        self.table = TraceRecorder(["Итерация", "X", "Y"], capacity=TABLE_CAPACITY, formats=[".0f", "g", "g"])
+        self.table_view = TraceView(self.table_frame, self.table)
+        self.table_view.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Button(self.table_frame, text="Экспорт CSV", command=self.table_view.export_csv).pack(anchor=tk.E)
 
-        for col in columns:
-            self.table.heading(col, text=col)
-            self.table.column(col, width=100, anchor="center")
+    def show_table(self):
+        self.table_view.first = 0
+        self.table_view.refresh()
 
     def log_debug(self, text):
         self.debug_text.config(state=tk.NORMAL)
@@ -86,11 +114,23 @@ class LineEditor(tk.Tk):
         self.curve_type = curve
         self.curve_var.set(curve)
 
+    def set_backend(self, backend):
+        self.backend = backend
+        self.backend_var.set(backend)
+        if backend == "Framebuffer" and self.framebuffer is None:
+            self.framebuffer = FrameBuffer(self.canvas, self.canvas.winfo_width(), self.canvas.winfo_height())
+
+    def resize_framebuffer(self, event):
+        if self.framebuffer is not None:
+            self.framebuffer.resize(event.width, event.height)
+            self.framebuffer.blit()
+
     def start_draw(self, event):
         self.start_x, self.start_y = event.x, self.transform_y(event.y)
 
     def end_draw(self, event):
         self.end_x, self.end_y = event.x, self.transform_y(event.y)
+        self.table.clear()
         if self.curve_type == "Circle":
             self.draw_circle()
         elif self.curve_type == "Ellipse":
@@ -99,112 +139,64 @@ class LineEditor(tk.Tk):
             self.draw_hyperbola()
         elif self.curve_type == "Parabola":
             self.draw_parabola()
+        if self.backend == "Framebuffer":
+            self.framebuffer.blit()
+        self.show_table()
 
     def draw_circle(self):
         r = abs(self.end_x - self.start_x)
-        x, y = 0, r
-        d = 3 - 2 * r
-
-        for row in self.table.get_children():
-            self.table.delete(row)
-
-        iteration = 0
-        while x <= y:
-            for dx, dy in [(x, y), (y, x), (-x, y), (-y, x), (x, -y), (y, -x), (-x, -y), (-y, -x)]:
-                self.canvas.create_oval(self.start_x + dx, self.transform_y(self.start_y + dy),
-                                        self.start_x + dx + 1, self.transform_y(self.start_y + dy) + 1, fill="black")
-                self.table.insert("", "end", values=[iteration, self.start_x + dx, self.start_y + dy,
-                                                     f"Plot({self.start_x + dx}, {self.start_y + dy})"])
-            if d < 0:
-                d += 4 * x + 6
-            else:
-                d += 4 * (x - y) + 10
-                y -= 1
-            x += 1
-            iteration += 1
+        xs, ys, iterations = mirror_octants(*circle_octant(r))
+        self.table.extend(iterations, self.start_x + xs, self.start_y + ys)
+        if self.fill_var.get():
+            self.fill_spans(*circle_spans(r))
+        else:
+            self.plot_points(*circle_pattern(r))
 
     def draw_ellipse(self):
         rx = abs(self.end_x - self.start_x)
         ry = abs(self.end_y - self.start_y)
-        x, y = 0, ry
-        d1 = ry**2 - rx**2 * ry + 0.25 * rx**2
-        dx, dy = 2 * ry**2 * x, 2 * rx**2 * y
-
-        for row in self.table.get_children():
-            self.table.delete(row)
-
-        iteration = 0
-        while dx < dy:
-            self.plot_ellipse_points(x, y, iteration)
-            if d1 < 0:
-                x += 1
-                dx += 2 * ry**2
-                d1 += dx + ry**2
-            else:
-                x += 1
-                y -= 1
-                dx += 2 * ry**2
-                dy -= 2 * rx**2
-                d1 += dx - dy + ry**2
-
-        d2 = ry**2 * (x + 0.5)**2 + rx**2 * (y - 1)**2 - rx**2 * ry**2
-        while y >= 0:
-            self.plot_ellipse_points(x, y, iteration)
-            if d2 > 0:
-                y -= 1
-                dy -= 2 * rx**2
-                d2 += rx**2 - dy
-            else:
-                y -= 1
-                x += 1
-                dx += 2 * ry**2
-                dy -= 2 * rx**2
-                d2 += dx - dy + rx**2
-
-    def plot_ellipse_points(self, x, y, iteration):
-        for dx, dy in [(x, y), (-x, y), (x, -y), (-x, -y)]:
-            self.canvas.create_oval(self.start_x + dx, self.transform_y(self.start_y + dy),
-                                    self.start_x + dx + 1, self.transform_y(self.start_y + dy) + 1, fill="black")
-            self.table.insert("", "end", values=[iteration, self.start_x + dx, self.start_y + dy,
-                                                 f"Plot({self.start_x + dx}, {self.start_y + dy})"])
+        xs, ys, iterations = mirror_quadrants(*ellipse_quadrant(rx, ry))
+        self.table.extend(iterations, self.start_x + xs, self.start_y + ys)
+        if self.fill_var.get():
+            self.fill_spans(*ellipse_spans(rx, ry))
+        else:
+            self.plot_points(*ellipse_pattern(rx, ry))
+
+    def plot_points(self, xs, ys):
+        """Выводит пиксели фигуры (смещения от центра), каждый по одному разу."""
+        xs, ys = self.start_x + xs, self.canvas.winfo_height() - self.start_y - ys
+        if self.backend == "Framebuffer":
+            self.framebuffer.put_pixels(xs, ys)
+            return
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            self.canvas.create_oval(x, y, x + 1, y + 1, fill="black")
+
+    def fill_spans(self, xs, ys, lengths):
+        """Заливает фигуру строками (x, y, длина) — по операции на строку, а не на пиксель."""
+        xs, ys = self.start_x + xs, self.canvas.winfo_height() - self.start_y - ys
+        if self.backend == "Framebuffer":
+            self.framebuffer.fill_spans(xs, ys, lengths)
+            return
+        for x, y, length in zip(xs.tolist(), ys.tolist(), lengths.tolist()):
+            self.canvas.create_rectangle(x, y, x + length, y + 1, fill="black", outline="")
+
+    def canvas_extent(self):
+        """Наибольшие смещения от центра по x и y, при которых точка ещё может попасть на холст."""
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        return max(self.start_x, width - 1 - self.start_x), max(self.start_y, height - self.start_y)
 
     def draw_hyperbola(self):
         a = abs(self.end_x - self.start_x)
         b = abs(self.end_y - self.start_y)
-        x = a
-        iteration = 0
-
-        for row in self.table.get_children():
-            self.table.delete(row)
-
-        while x < self.canvas.winfo_width():
-            y = b * math.sqrt((x ** 2 / a ** 2) - 1)
-            self.plot_symmetric_points(x, y, iteration)
-            x += 1
-            iteration += 1
+        xs, ys, iterations = mirror_quadrants(*hyperbola_quadrant(a, b, *self.canvas_extent()))
+        self.table.extend(iterations, self.start_x + xs, self.start_y + ys)
+        self.plot_points(*unique_pixels(xs, ys))
 
     def draw_parabola(self):
         p = abs(self.end_y - self.start_y) // 2
-        x = 0
-        y = 0
-        iteration = 0
-
-        for row in self.table.get_children():
-            self.table.delete(row)
-
-        while y < self.canvas.winfo_height():
-            y = (x ** 2) / (2 * p)
-            self.plot_symmetric_points(x, y, iteration)
-            x += 1
-            iteration += 1
-
-    def plot_symmetric_points(self, x, y, iteration):
-        for dx, dy in [(x, y), (-x, y), (x, -y), (-x, -y)]:
-            self.canvas.create_oval(self.start_x + dx, self.transform_y(self.start_y + dy),
-                                    self.start_x + dx + 1, self.transform_y(self.start_y + dy) + 1, fill="black")
-            self.table.insert("", "end", values=[iteration, self.start_x + dx, self.start_y + dy,
-                                                 f"Plot({self.start_x + dx}, {self.start_y + dy})"])
-
+        xs, ys, iterations = mirror_quadrants(*parabola_quadrant(p, *self.canvas_extent()))
+        self.table.extend(iterations, self.start_x + xs, self.start_y + ys)
+        self.plot_points(*unique_pixels(xs, ys))
 
 if __name__ == "__main__":
     app = LineEditor()
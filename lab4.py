@@ -1,70 +1,141 @@
 import pygame
 import numpy as np
 import math
+import threading
+import time
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from clipping import clip_polygons_near, clip_segments, clip_segments_near, clip_steps
+from frame_timing import FrameTimer
+from lod import Level, choose_level, load_levels
+from mesh_io import Mesh, face_centers, face_normals, face_winding, select_faces, triangulate
+from rasterizers import accumulate_coverage, coverage_to_rgb, intensity_lut, rasterize_bresenham, rasterize_wu
+from zbuffer import ZBuffer
 
 WIDTH, HEIGHT = 800, 600
+PROJECTION_SCALE = 200
 WHITE = (255, 255, 255)
 GRAY = (200, 200, 200)
-
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("3D Transformations")
-
-angle_x, angle_y, angle_z = 0, 0, 0
-scale = 1.0
-distance = 5
-translate_x, translate_y, translate_z = 0, 0, 0
-vertices, faces = np.array([]), np.array([])
-
-def load_object(filename):
-    global vertices, faces
-
-    vertices = []
-    faces = []
-
-    try:
-        with open(filename, 'r') as file:
-            reading_faces = False
-            for line in file:
-                if line.startswith("#") or line.strip() == "":
-                    reading_faces = True
-                    continue
-
-                parts = line.strip().split()
-                if reading_faces:
-                    faces.append(list(map(int, parts)))
-                else:
-                    vertices.append(list(map(float, parts)))
-
-        vertices = np.array(vertices)
-        faces = np.array(faces)
-
-        if vertices.size == 0 or faces.size == 0:
-            raise ValueError("Invalid object file format or empty content.")
-
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to load 3D object: {e}")
-        vertices = np.array([])
-        faces = np.array([])
-
-def transform(matrix, vertices):
-    if vertices.size == 0:
-        return vertices
-
-    if vertices.ndim != 2 or vertices.shape[1] != 3:
-        messagebox.showerror("Error", "Invalid vertex format.")
-        return vertices
-
-    vertices = np.hstack((vertices, np.ones((len(vertices), 1))))
-    return np.dot(vertices, matrix.T)[:, :3]
-
-def draw_object():
-    screen.fill(WHITE)
-
-    if vertices.size == 0 or faces.size == 0:
-        return
+WIREFRAME_LUT = intensity_lut(ink=GRAY, background=WHITE)
+RENDER_MODES = ["Wireframe", "Solid", "Z-buffer"]
+SOLID_COLOR = np.array([170, 190, 230])
+# Направление на источник света (к наблюдателю и вверх экрана) и доля фонового освещения
+LIGHT = np.array([0.3, -0.5, -1.0]) / np.linalg.norm([0.3, -0.5, -1.0])
+AMBIENT = 0.2
+
+# События окна, после которых кадр нужно вывести заново
+REDRAW_EVENTS = {pygame.VIDEOEXPOSE, pygame.VIDEORESIZE, pygame.WINDOWEXPOSED,
+                 pygame.WINDOWSIZECHANGED, pygame.WINDOWRESTORED, pygame.WINDOWSHOWN}
+# Период опроса событий окна в простое, с
+IDLE_POLL = 0.05
+# Бюджет кадра во время взаимодействия и пауза, после которой модель выводится полностью, с
+FRAME_BUDGET = 1 / 30
+IDLE_DELAY = 0.25
+# Начальная оценка времени отрисовки одной грани, пока оно не измерено, с
+DEFAULT_FACE_COST = 2e-6
+# Рёбра с концами дальше этого от начала экрана обрезаются с округлением концов:
+# иначе номера шагов растеризации не помещаются в int64
+MAX_SCREEN_COORD = 1 << 30
+
+class SceneState(NamedTuple):
+    """Неизменяемый снимок сцены: параметры преобразования, модель и собранная матрица.
+
+    GUI публикует новый снимок целиком через publish(), поток отрисовки берёт
+    текущий снимок один раз за кадр, поэтому кадр не смешивает старое и новое состояние.
+    """
+    version: int = 0
+    angle_x: float = 0.0
+    angle_y: float = 0.0
+    angle_z: float = 0.0
+    scale: float = 1.0
+    distance: float = 5.0
+    translate_x: float = 0.0
+    translate_y: float = 0.0
+    translate_z: float = 0.0
+    mesh: Mesh = None
+    levels: tuple = ()
+    hud: bool = False
+    antialias: bool = False
+    render_mode: str = "Wireframe"
+    near: float = 0.1
+    frustum_cull: bool = True
+    matrix: np.ndarray = np.eye(4)
+
+TRANSFORM_FIELDS = {"angle_x", "angle_y", "angle_z", "scale", "translate_x", "translate_y", "translate_z"}
+
+scene = SceneState()
+scene_lock = threading.Lock()
+redraw = threading.Event()
+render_cpu = 0.0
+zbuffer = None
+buffers = {}
+timer = FrameTimer()
+hud_font = None
+screen = None
+
+def publish(**changes):
+    """Заменяет текущий снимок сцены новым с указанными изменениями и просит перерисовку."""
+    global scene
+    with scene_lock:
+        state = scene._replace(version=scene.version + 1, **changes)
+        # Матрица пересобирается только после изменения параметров преобразования
+        if TRANSFORM_FIELDS & changes.keys():
+            with timer.stage("matrix"):
+                state = state._replace(matrix=build_transformation(state))
+        scene = state
+    redraw.set()
+
+def open_window():
+    """Создаёт окно pygame; отрисовка без окна (render_frame) его не требует."""
+    global screen
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("3D Transformations")
+
+def load_model(filename):
+    """Читает модель и её уровни детализации; уровень 0 — исходная сетка."""
+    return load_levels(filename)
+
+class VertexBuffers:
+    """Вершины модели в однородных координатах float32 и выходные буферы кадра.
+
+    Модель переводится в однородную форму один раз при смене сетки; преобразование
+    и проекция пишут результат в одни и те же массивы, поэтому кадр не выделяет
+    память пропорционально числу вершин.
+    """
+
+    def __init__(self, mesh):
+        self.mesh = mesh
+        count = len(mesh.vertices)
+        self.model = np.ones((count, 4), dtype=np.float32)
+        self.model[:, :3] = mesh.vertices
+        self.matrix = np.empty((4, 4), dtype=np.float32)
+        self.camera = np.empty((count, 4), dtype=np.float32)
+        self.points = np.empty((count, 2), dtype=np.float32)
+
+    def transform(self, matrix, distance):
+        """Вершины в пространстве камеры (вид на внутренний буфер, действителен до следующего кадра)."""
+        # Строки-векторы умножаются на транспонированную матрицу; отодвигание камеры — её перенос по z
+        np.copyto(self.matrix, matrix.T)
+        self.matrix[3, 2] += distance
+        np.matmul(self.model, self.matrix, out=self.camera)
+        return self.camera[:, :3]
+
+    def project(self, width, height):
+        """Экранные координаты вершин после transform() — то же, что project(), без новых массивов."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.divide(self.camera[:, :2], self.camera[:, 2:3], out=self.points)
+        self.points *= PROJECTION_SCALE
+        self.points += (width // 2, height // 2)
+        return self.points
+
+def build_transformation(state):
+    angle_x, angle_y, angle_z = state.angle_x, state.angle_y, state.angle_z
+    scale = state.scale
+    translate_x, translate_y, translate_z = state.translate_x, state.translate_y, state.translate_z
 
     rx = np.array([
         [1, 0, 0, 0],
@@ -101,63 +172,308 @@ def draw_object():
         [0, 0, 0, 1]
     ])
 
-    transformation = np.dot(rx, ry)
-    transformation = np.dot(transformation, rz)
-    transformation = np.dot(transformation, scale_matrix)
-    transformation = np.dot(translation_matrix, transformation)
-
-    transformed_vertices = transform(transformation, vertices)
-
-    projected_vertices = np.array([
-        [x / (z + distance), y / (z + distance), z]
-        for x, y, z in transformed_vertices
-    ])
-
-    offset = np.array([WIDTH // 2, HEIGHT // 2])
-    projected_vertices[:, :2] *= 200
-    projected_vertices[:, :2] += offset
-
-    for face in faces:
-        points = [projected_vertices[i][:2] for i in face]
-        pygame.draw.polygon(screen, GRAY, points, 1)
+    matrix = np.dot(rx, ry)
+    matrix = np.dot(matrix, rz)
+    matrix = np.dot(matrix, scale_matrix)
+    return np.dot(translation_matrix, matrix)
+
+def project(camera_vertices, width=WIDTH, height=HEIGHT):
+    """Перспективная проекция точек камеры на экран: (x, y) / z, масштаб и перенос в центр окна."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        points = camera_vertices[:, :2] / camera_vertices[:, 2:3]
+    points *= PROJECTION_SCALE
+    points += (width // 2, height // 2)
+    return points
+
+def outside_view(mesh, points, width, height):
+    """Грани, все вершины которых лежат по одну сторону от какой-либо границы окна."""
+    x, y = points[mesh.indices, 0], points[mesh.indices, 1]
+    codes = (x < 0) * 1 | (x >= width) * 2 | (y < 0) * 4 | (y >= height) * 8
+    return np.bitwise_and.reduceat(codes, mesh.offsets[:-1]) != 0
+
+def view_mesh(mesh, camera_vertices, points, near, frustum_cull, width, height):
+    """Сетка кадра: грани перед ближней плоскостью (без ушедших за край окна, если frustum_cull)
+    и грани, обрезанные ближней плоскостью. Возвращает (сетка, вершины камеры, экранные точки);
+    если ничего не отсечено, возвращается исходная сетка без копирования."""
+    ahead = camera_vertices[:, 2] >= near
+    count = np.add.reduceat(ahead[mesh.indices].astype(np.int64), mesh.offsets[:-1])
+    whole = count == mesh.face_sizes
+    crossing = np.flatnonzero((count > 0) & ~whole)
+    if frustum_cull:
+        whole &= ~outside_view(mesh, points, width, height)
+    if whole.all() and len(crossing) == 0:
+        return mesh, camera_vertices, points
+
+    indices, offsets = select_faces(mesh, np.flatnonzero(whole))
+    cut_indices, cut_offsets = select_faces(mesh, crossing)
+    cut_points, cut_offsets = clip_polygons_near(camera_vertices, cut_indices, cut_offsets, near)
+
+    vertices = np.vstack((camera_vertices, cut_points))
+    indices = np.concatenate((indices, len(camera_vertices) + np.arange(len(cut_points))))
+    offsets = np.concatenate((offsets, offsets[-1] + cut_offsets[1:]))
+    frame = Mesh(vertices, indices, offsets)
+    frame = frame._replace(triangles=triangulate(frame))
+    return frame, vertices, np.vstack((points, project(cut_points, width, height)))
+
+def pixel_scale(state):
+    """Примерное число пикселей экрана на единицу модели при текущем масштабе и удалении."""
+    return PROJECTION_SCALE * state.scale / max(state.distance + state.translate_z, state.near)
+
+def draw_object(state, level=0):
+    """Выводит кадр в окно; level — номер уровня детализации модели из state.levels.
+
+    Время этапов кадра записывается в timer; при state.hud поверх кадра выводятся их перцентили.
+    """
+    faces = render_frame(screen, state, level)
+    if state.mesh is None:
+        pygame.display.flip()
+        return
 
-    pygame.display.flip()
+    if state.hud:
+        draw_hud(screen, timer.summary() + [f"LOD {level}: {faces} faces"])
+    with timer.stage("drawing"):
+        pygame.display.flip()
+    timer.end_frame(level, faces)
+
+def render_frame(surface, state, level=0):
+    """Рисует кадр на поверхность pygame (окно или внеэкранную) и возвращает число граней модели."""
+    if state.mesh is None:
+        surface.fill(WHITE)
+        return 0
+    # Сетка без уровней детализации (передана в сцену напрямую): обход граней определяется здесь
+    entry = state.levels[level] if state.levels else Level(state.mesh, 0.0, face_winding(state.mesh))
+    mesh = entry.mesh
+    faces = mesh.face_count
+
+    with timer.stage("transform"):
+        # Буферы вершин хранятся для всех уровней текущей модели, чтобы смена уровня не выделяла память
+        mesh_buffers = buffers.get(id(mesh))
+        if mesh_buffers is None or mesh_buffers.mesh is not mesh:
+            live = {id(state.mesh)} | {id(entry.mesh) for entry in state.levels}
+            for key in buffers.keys() - live:
+                del buffers[key]
+            mesh_buffers = buffers[id(mesh)] = VertexBuffers(mesh)
+        # Пространство камеры: камера в начале координат, ось взгляда +z
+        camera_vertices = mesh_buffers.transform(state.matrix, state.distance)
+    width, height = surface.get_size()
+
+    if state.render_mode == "Wireframe":
+        if len(camera_vertices) == 0 or camera_vertices[:, 2].min() >= state.near:
+            # Модель целиком перед ближней плоскостью: рёбра берут уже спроецированные вершины
+            with timer.stage("projection"):
+                points = mesh_buffers.project(width, height)
+                starts, ends = points[mesh.edges[:, 0]], points[mesh.edges[:, 1]]
+        else:
+            with timer.stage("culling"):
+                starts, ends, visible = clip_segments_near(camera_vertices[mesh.edges[:, 0]],
+                                                           camera_vertices[mesh.edges[:, 1]], state.near)
+            with timer.stage("projection"):
+                starts, ends = project(starts[visible], width, height), project(ends[visible], width, height)
+        with timer.stage("drawing"):
+            surface.fill(WHITE)
+            draw_wireframe(surface, starts, ends, state.antialias)
+    else:
+        with timer.stage("projection"):
+            points = mesh_buffers.project(width, height)
+        with timer.stage("culling"):
+            mesh, camera_vertices, points = view_mesh(mesh, camera_vertices, points, state.near,
+                                                      state.frustum_cull, width, height)
+            shading = shade_faces(mesh, camera_vertices, entry.winding)
+        with timer.stage("drawing"):
+            surface.fill(WHITE)
+            if state.render_mode == "Solid":
+                draw_solid(surface, points, mesh, shading)
+            else:
+                draw_zbuffer(surface, points, camera_vertices, mesh, shading)
+    return faces
+
+def draw_hud(surface, lines):
+    """Выводит строки текста в левом верхнем углу на полупрозрачной подложке."""
+    global hud_font
+    if hud_font is None:
+        hud_font = pygame.font.SysFont("monospace", 14)
+    images = [hud_font.render(line, True, (0, 0, 0)) for line in lines]
+    panel = pygame.Surface((max(image.get_width() for image in images) + 8,
+                            sum(image.get_height() for image in images) + 8), pygame.SRCALPHA)
+    panel.fill((255, 255, 255, 200))
+    y = 4
+    for image in images:
+        panel.blit(image, (4, y))
+        y += image.get_height()
+    surface.blit(panel, (0, 0))
+
+def draw_wireframe(surface, starts, ends, antialias=False):
+    """Рисует все рёбра за один вывод: отрезки растеризуются массивами и копируются на поверхность."""
+    width, height = surface.get_size()
+    segments = np.hstack((starts, ends))
+    segments = segments[np.isfinite(segments).all(axis=1)]
+    rect = (0, 0, width - 1, height - 1)
+    far = (np.abs(segments) > MAX_SCREEN_COORD).any(axis=1)
+    segments = np.vstack((np.rint(segments[~far]), clip_segments(segments[far], rect)))
+    # Рёбра не укорачиваются: растеризуются только шаги, попадающие в окно
+    segments, ranges = clip_steps(segments, rect)
+
+    coverage = np.zeros((height, width), dtype=np.float32)
+    if antialias:
+        xs, ys, c = rasterize_wu(segments, ranges)
+    else:
+        xs, ys = rasterize_bresenham(segments, ranges)
+        c = 1.0
+    accumulate_coverage(coverage, xs, ys, c)
+    pygame.surfarray.blit_array(surface, coverage_to_rgb(coverage, WIREFRAME_LUT).swapaxes(0, 1))
+
+def shade_faces(mesh, camera_vertices, winding):
+    """Видимые грани и их цвет по Ламберту: (номера граней, глубина их центров, цвета uint8).
+
+    Лицевая грань видна на экране обходом против часовой стрелки; winding (см. face_winding)
+    приводит к этому правилу сетки с обратным обходом. У незамкнутой сетки (winding == 0)
+    видны обе стороны граней, и каждая освещается со стороны наблюдателя.
+    """
+    normals = face_normals(mesh, camera_vertices)
+    centers = face_centers(mesh, camera_vertices)
+    facing = np.einsum("ij,ij->i", normals, centers)
+    if winding:
+        visible = np.flatnonzero(winding * facing < 0)
+        normals = normals[visible] * winding
+    else:
+        visible = np.arange(mesh.face_count)
+        normals[facing > 0] *= -1
+
+    lengths = np.maximum(np.linalg.norm(normals, axis=1), 1e-12)
+    shade = AMBIENT + (1 - AMBIENT) * np.clip(normals @ LIGHT / lengths, 0, 1)
+    return visible, centers[visible, 2], (SOLID_COLOR * shade[:, None]).astype(np.uint8)
+
+def draw_solid(surface, points, mesh, shading):
+    """Заливка лицевых граней (shading — результат shade_faces) с сортировкой по глубине."""
+    visible, depth, colors = shading
+    # Алгоритм художника: сначала дальние грани
+    order = np.argsort(-depth)
+
+    # pygame принимает координаты только как числа Python или float64
+    polygons = mesh.faces(points.astype(np.float64))
+    for face, color in zip(visible[order].tolist(), colors[order].tolist()):
+        pygame.draw.polygon(surface, color, polygons[face])
+
+def draw_zbuffer(surface, points, camera_vertices, mesh, shading):
+    """Лицевые треугольники растеризуются с буфером глубины и выводятся на поверхность одним копированием."""
+    global zbuffer
+    width, height = surface.get_size()
+    if zbuffer is None:
+        zbuffer = ZBuffer(width, height, WHITE)
+    else:
+        zbuffer.resize(width, height)
+        zbuffer.clear()
+
+    visible, _, colors = shading
+    face_colors = np.zeros((mesh.face_count, 3), dtype=np.uint8)
+    face_colors[visible] = colors
+    front = np.zeros(mesh.face_count, dtype=bool)
+    front[visible] = True
+
+    triangle_faces = mesh.triangle_faces()
+    selected = front[triangle_faces]
+    # Неиспользуемые вершины могут лежать в плоскости камеры (z = 0); их треугольников в кадре нет
+    with np.errstate(divide="ignore"):
+        inverse_depth = 1 / camera_vertices[:, 2]
+    zbuffer.draw_triangles(points, inverse_depth, mesh.triangles[selected],
+                           face_colors[triangle_faces[selected]])
+    pygame.surfarray.blit_array(surface, zbuffer.color.swapaxes(0, 1))
 
 def pygame_render():
+    global render_cpu
     clock = pygame.time.Clock()
     running = True
+    redraw.set()
+    wall, cpu = time.perf_counter(), time.thread_time()
+    # Время отрисовки одной грани по режимам и момент последнего изменения вида
+    face_cost = {}
+    shown, changed, level = scene, 0.0, 0
 
     while running:
+        # Без изменений поток спит до запроса перерисовки, лишь изредка опрашивая окно
+        redraw.wait(IDLE_POLL)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
-
-        draw_object()
-        clock.tick(60)
+            elif event.type in REDRAW_EVENTS:
+                redraw.set()
+
+        now = time.perf_counter()
+        # После паузы во взаимодействии упрощённый кадр заменяется полным
+        if level and now - changed >= IDLE_DELAY:
+            redraw.set()
+
+        if redraw.is_set() and running:
+            redraw.clear()
+            state = scene
+            if state.mesh is not shown.mesh:
+                changed = 0.0
+            elif (state.matrix is not shown.matrix or state.distance != shown.distance or
+                  state.near != shown.near):
+                changed = now
+            shown = state
+
+            level = 0
+            if len(state.levels) > 1 and now - changed < IDLE_DELAY:
+                level = choose_level(state.levels, face_cost.get(state.render_mode, DEFAULT_FACE_COST),
+                                     FRAME_BUDGET, pixel_scale(state))
+            start = time.perf_counter()
+            draw_object(state, level)
+            faces = state.levels[level].mesh.face_count if state.levels else 0
+            if faces:
+                cost = (time.perf_counter() - start) / faces
+                face_cost[state.render_mode] = (face_cost.get(state.render_mode, cost) + cost) / 2
+            clock.tick(60)
+
+        now = time.perf_counter()
+        if now - wall >= 1:
+            render_cpu = (time.thread_time() - cpu) / (now - wall)
+            pygame.display.set_caption(f"3D Transformations (render thread CPU: {render_cpu:.1%})")
+            wall, cpu = now, time.thread_time()
 
     pygame.quit()
 
 def gui():
-    global angle_x, angle_y, angle_z, scale, distance
-    global translate_x, translate_y, translate_z
-    global x_slider, y_slider, z_slider, scale_slider, distance_slider
+    global x_slider, y_slider, z_slider, scale_slider, distance_slider, near_slider
     global tx_slider, ty_slider, tz_slider
 
+    # Модель читается в отдельном потоке и подменяется в сцене, когда готова целиком
+    loader = ThreadPoolExecutor(max_workers=1)
+
     def update_values():
-        global angle_x, angle_y, angle_z, scale, distance, translate_x, translate_y, translate_z
-        angle_x = math.radians(x_slider.get())
-        angle_y = math.radians(y_slider.get())
-        angle_z = math.radians(z_slider.get())
-        scale = scale_slider.get()
-        distance = distance_slider.get()
-        translate_x = tx_slider.get()
-        translate_y = ty_slider.get()
-        translate_z = tz_slider.get()
+        publish(angle_x=math.radians(x_slider.get()),
+                angle_y=math.radians(y_slider.get()),
+                angle_z=math.radians(z_slider.get()),
+                scale=scale_slider.get(),
+                distance=distance_slider.get(),
+                near=near_slider.get(),
+                translate_x=tx_slider.get(),
+                translate_y=ty_slider.get(),
+                translate_z=tz_slider.get())
+
+    def finish_loading(future):
+        if not future.done():
+            root.after(50, finish_loading, future)
+            return
+        root.config(cursor="")
+        try:
+            levels = future.result()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load 3D object: {e}")
+            return
+        publish(mesh=levels[0].mesh, levels=levels)
 
     def load_file():
-        filename = filedialog.askopenfilename(filetypes=[("Text files", "*.txt")])
+        filename = filedialog.askopenfilename(filetypes=[("3D models", "*.txt *.obj"), ("Text files", "*.txt"),
+                                                         ("Wavefront OBJ", "*.obj")])
         if filename:
-            load_object(filename)
+            root.config(cursor="watch")
+            finish_loading(loader.submit(load_model, filename))
+
+    def save_timing():
+        filename = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")])
+        if filename:
+            timer.to_csv(filename)
 
     def reset_values():
         x_slider.set(0)
@@ -165,6 +481,7 @@ def gui():
         z_slider.set(0)
         scale_slider.set(1.0)
         distance_slider.set(5.0)
+        near_slider.set(0.1)
         tx_slider.set(0)
         ty_slider.set(0)
         tz_slider.set(0)
@@ -172,7 +489,7 @@ def gui():
 
     root = tk.Tk()
     root.title("3D Transformations GUI")
-    root.geometry("400x700")
+    root.geometry("400x940")
 
     ttk.Button(root, text="Load 3D Object", command=load_file).pack(pady=10)
 
@@ -198,6 +515,11 @@ def gui():
     distance_slider.set(5.0)
     distance_slider.pack()
 
+    ttk.Label(root, text="Near Plane").pack()
+    near_slider = ttk.Scale(root, from_=0.01, to=2.0, command=lambda _: update_values())
+    near_slider.set(0.1)
+    near_slider.pack()
+
     ttk.Label(root, text="Translate X").pack()
     tx_slider = ttk.Scale(root, from_=-10.0, to=10.0, command=lambda _: update_values())
     tx_slider.pack()
@@ -210,10 +532,29 @@ def gui():
     tz_slider = ttk.Scale(root, from_=-10.0, to=10.0, command=lambda _: update_values())
     tz_slider.pack()
 
+    ttk.Label(root, text="Render Mode").pack()
+    mode_selector = ttk.Combobox(root, values=RENDER_MODES, state="readonly")
+    mode_selector.set(RENDER_MODES[0])
+    mode_selector.bind("<<ComboboxSelected>>", lambda e: publish(render_mode=mode_selector.get()))
+    mode_selector.pack()
+
+    antialias_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(root, text="Anti-aliased edges", variable=antialias_var,
+                    command=lambda: publish(antialias=antialias_var.get())).pack(pady=5)
+
+    frustum_var = tk.BooleanVar(value=True)
+    ttk.Checkbutton(root, text="Frustum culling", variable=frustum_var,
+                    command=lambda: publish(frustum_cull=frustum_var.get())).pack(pady=5)
+
+    hud_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(root, text="Timing HUD", variable=hud_var,
+                    command=lambda: publish(hud=hud_var.get())).pack(pady=5)
+    ttk.Button(root, text="Save Timing CSV", command=save_timing).pack(pady=5)
+
     ttk.Button(root, text="Reset", command=reset_values).pack(pady=10)
     ttk.Button(root, text="Exit", command=root.quit).pack(pady=10)
 
-    import threading
+    open_window()
     threading.Thread(target=pygame_render, daemon=True).start()
 
     root.mainloop()
@@ -1,7 +1,17 @@
+import os
+import sys
 import tkinter as tk
 from tkinter import ttk, Menu
 from PolygonEditor import PolygonEditor
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from framebuffer import FrameBuffer, intensity_color
+from rasterizers import rasterize_wu, pixels_to_spans
+from clipping import ClipStats, clip_steps
+
+# Интервал обновления предпросмотра линии, мс (около 60 кадров в секунду)
+PREVIEW_INTERVAL_MS = 16
+
 
 class LineEditor(tk.Tk):
     def __init__(self):
@@ -16,6 +26,21 @@ class LineEditor(tk.Tk):
         self.end_x = self.end_y = None
         self.algorithm = "CDA"
         self.hull_method = "Graham"
+        self.backend = "Canvas"
+        self.framebuffer = None
+        self.clip_method = "Liang-Barsky"
+        self.clip_stats = ClipStats()
+
+        # Состояние предпросмотра: позиция мыши, отрисованный конец и элементы холста по пикселям
+        self.dragging = False
+        self.preview_target = None
+        self.preview_end = None
+        self.preview_job = None
+        self.preview_items = {}
+
+        # Ломаная: продолжается ли цепочка звеньев и общая вершина, которая уже нарисована
+        self.polyline_active = False
+        self.shared_vertex = None
 
         self.create_menu()
         self.create_toolbar()
@@ -23,7 +48,9 @@ class LineEditor(tk.Tk):
 
         self.canvas.bind("<Button-1>", self.start_draw)
         self.canvas.bind("<ButtonRelease-1>", self.end_draw)
+        self.canvas.bind("<Button-3>", self.finish_polyline)
         self.canvas.bind("<Motion>", self.track_mouse)
+        self.canvas.bind("<Configure>", self.resize_framebuffer)
 
         self.polygon_editor = None
         self.current_mode = "line" 
@@ -39,6 +66,18 @@ class LineEditor(tk.Tk):
         algo_menu.add_command(label="Ву", command=lambda: self.set_algorithm("Wu"))
         menu_bar.add_cascade(label="Алгоритм", menu=algo_menu)
 
+        # Меню вывода
+        backend_menu = Menu(menu_bar, tearoff=0)
+        backend_menu.add_command(label="Элементы холста", command=lambda: self.set_backend("Canvas"))
+        backend_menu.add_command(label="Буфер кадра", command=lambda: self.set_backend("Framebuffer"))
+        menu_bar.add_cascade(label="Вывод", menu=backend_menu)
+
+        # Меню отсечения
+        clip_menu = Menu(menu_bar, tearoff=0)
+        clip_menu.add_command(label="Коэн-Сазерленд", command=lambda: self.set_clip_method("Cohen-Sutherland"))
+        clip_menu.add_command(label="Лянг-Барски", command=lambda: self.set_clip_method("Liang-Barsky"))
+        menu_bar.add_cascade(label="Отсечение", menu=clip_menu)
+
         # Меню режимов
         mode_menu = Menu(menu_bar, tearoff=0)
         mode_menu.add_command(label="Режим линий", command=self.enable_line_mode)
@@ -63,6 +102,24 @@ class LineEditor(tk.Tk):
         algo_combobox.pack(side=tk.LEFT)
         algo_combobox.bind("<<ComboboxSelected>>", lambda e: self.set_algorithm(self.algo_var.get()))
 
+        # Выбор способа вывода пикселей
+        ttk.Label(toolbar, text="Вывод:").pack(side=tk.LEFT, padx=(10, 0))
+        self.backend_var = tk.StringVar(value=self.backend)
+        backend_combobox = ttk.Combobox(toolbar, textvariable=self.backend_var,
+                                        values=["Canvas", "Framebuffer"], state="readonly")
+        backend_combobox.pack(side=tk.LEFT)
+        backend_combobox.bind("<<ComboboxSelected>>", lambda e: self.set_backend(self.backend_var.get()))
+
+        self.spans_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(toolbar, text="Серии", variable=self.spans_var).pack(side=tk.LEFT, padx=(10, 0))
+
+        self.polyline_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(toolbar, text="Ломаная (ПКМ — завершить)",
+                        variable=self.polyline_var).pack(side=tk.LEFT, padx=(10, 0))
+
+        self.preview_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(toolbar, text="Предпросмотр", variable=self.preview_var).pack(side=tk.LEFT, padx=(10, 0))
+
         # Выбор метода выпуклой оболочки
         ttk.Label(toolbar, text="Метод оболочки:").pack(side=tk.LEFT, padx=(10, 0))
         self.hull_var = tk.StringVar(value=self.hull_method)
@@ -85,6 +142,43 @@ class LineEditor(tk.Tk):
         if self.current_mode == "line" and self.start_x is not None:
             self.status_var.set(
                 f"Рисование линии из ({self.start_x}, {self.start_y}) в ({event.x}, {event.y})")
+            if self.dragging and self.preview_var.get():
+                # События движения только запоминают позицию; перерисовка не чаще раза в кадр
+                self.preview_target = (event.x, event.y)
+                if self.preview_job is None:
+                    self.preview_job = self.after(PREVIEW_INTERVAL_MS, self.update_preview)
+
+    def update_preview(self):
+        self.preview_job = None
+        if self.preview_target == self.preview_end:
+            return
+        self.preview_end = self.preview_target
+
+        pixels = {}
+        steps = self.clip_segment(self.start_x, self.start_y, *self.preview_end)
+        if steps is not None:
+            # ЦДА выдаёт дробные координаты: ключ — целый пиксель, иначе при сдвиге конца
+            # на пиксель меняются почти все ключи и линия перерисовывается целиком
+            for x, y, c in self.line_pixels(self.start_x, self.start_y, *self.preview_end, steps):
+                pixels[(int(x), int(y))] = "black" if c is None else intensity_color(c)
+
+        # Обновляем только пиксели, отличающиеся от предыдущего кадра предпросмотра
+        for key, (item, color) in list(self.preview_items.items()):
+            if pixels.get(key) != color:
+                self.canvas.delete(item)
+                del self.preview_items[key]
+        for (x, y), color in pixels.items():
+            if (x, y) not in self.preview_items:
+                item = self.canvas.create_oval(x, y, x + 1, y + 1, fill=color, outline="", tags="preview")
+                self.preview_items[(x, y)] = (item, color)
+
+    def clear_preview(self):
+        if self.preview_job is not None:
+            self.after_cancel(self.preview_job)
+            self.preview_job = None
+        self.canvas.delete("preview")
+        self.preview_items.clear()
+        self.preview_target = self.preview_end = None
 
     def enable_line_mode(self):
         self.current_mode = "line"
@@ -95,6 +189,8 @@ class LineEditor(tk.Tk):
 
         self.canvas.bind("<Button-1>", self.start_draw)
         self.canvas.bind("<ButtonRelease-1>", self.end_draw)
+        self.canvas.bind("<Button-3>", self.finish_polyline)
+        self.finish_polyline()
         self.status_var.set("Режим: рисование линий")
 
     def enable_polygon_mode(self):
@@ -116,6 +212,38 @@ class LineEditor(tk.Tk):
         self.algorithm = algo
         print(f"Алгоритм изменён на: {algo}")
 
+    def set_clip_method(self, method):
+        self.clip_method = method
+        print(f"Метод отсечения изменён на: {method}")
+
+    def set_backend(self, backend):
+        self.backend = backend
+        self.backend_var.set(backend)
+        if backend == "Framebuffer" and self.framebuffer is None:
+            self.framebuffer = FrameBuffer(self.canvas, self.canvas.winfo_width(), self.canvas.winfo_height())
+        print(f"Вывод изменён на: {backend}")
+
+    def resize_framebuffer(self, event):
+        if self.framebuffer is not None:
+            self.framebuffer.resize(event.width, event.height)
+            self.framebuffer.blit()
+
+    def plot(self, x, y, c=None):
+        # c — покрытие сглаженного пикселя, None — обычный чёрный пиксель
+        if self.shared_vertex == (int(x), int(y)):
+            return
+        if self.backend == "Framebuffer":
+            if c is None:
+                self.framebuffer.set_pixel(int(x), int(y))
+            else:
+                self.framebuffer.accumulate(int(x), int(y), c)
+        elif c is None:
+            self.canvas.create_oval(x, y, x + 1, y + 1,
+                                    fill="black", tags="line")
+        else:
+            self.canvas.create_oval(x, y, x + 1, y + 1,
+                                    fill=intensity_color(c), outline="", tags="line")
+
     def set_hull_method(self, method):
         self.hull_method = method
         if self.polygon_editor:
@@ -123,28 +251,103 @@ class LineEditor(tk.Tk):
         print(f"Метод выпуклой оболочки изменён на: {method}")
 
     def start_draw(self, event):
-        self.start_x, self.start_y = event.x, event.y
+        if self.polyline_var.get() and self.polyline_active:
+            # Следующее звено ломаной начинается в конце предыдущего, общая вершина не рисуется повторно
+            self.start_x, self.start_y = self.end_x, self.end_y
+            self.shared_vertex = (self.start_x, self.start_y)
+        else:
+            self.start_x, self.start_y = event.x, event.y
+            self.shared_vertex = None
+        self.dragging = True
 
     def end_draw(self, event):
         self.end_x, self.end_y = event.x, event.y
+        self.dragging = False
+        self.clear_preview()
         self.draw_line()
+        self.polyline_active = self.polyline_var.get()
+
+    def finish_polyline(self, event=None):
+        self.polyline_active = False
+        self.shared_vertex = None
+
+    def clip_segment(self, x1, y1, x2, y2, stats=None):
+        """Первый и последний шаг отрезка по ведущей оси, видимые на холсте (см. clipping.clip_steps);
+        None, если отрезок весь снаружи. Сам отрезок не меняется."""
+        rect = (0, 0, self.canvas.winfo_width() - 1, self.canvas.winfo_height() - 1)
+        segments, ranges = clip_steps([x1, y1, x2, y2], rect, self.clip_method, stats)
+        if len(segments) == 0:
+            return None
+        return tuple(map(int, ranges[0]))
 
     def draw_line(self):
         if None in [self.start_x, self.start_y, self.end_x, self.end_y]:
             return
 
-        self.canvas.delete("line")  # Удаляем предыдущую линию
+        if self.shared_vertex is None:
+            # Удаляем предыдущую линию; звенья одной ломаной остаются на холсте
+            self.canvas.delete("line")
+            if self.framebuffer is not None:
+                self.framebuffer.clear()
+
+        segment = (self.start_x, self.start_y, self.end_x, self.end_y)
+        steps = self.clip_segment(*segment, self.clip_stats)
+        if steps is None:
+            self.status_var.set(f"Отрезок вне холста. Отсечение: {self.clip_stats}")
+            if self.framebuffer is not None:
+                self.framebuffer.blit()
+            return
+
+        if self.backend == "Framebuffer" and self.algorithm == "Wu":
+            # Видимая часть отрезка растеризуется векторно и смешивается с буфером за один вызов
+            xs, ys, coverage = rasterize_wu(segment, [steps])
+            if self.shared_vertex is not None:
+                keep = (xs != self.shared_vertex[0]) | (ys != self.shared_vertex[1])
+                xs, ys, coverage = xs[keep], ys[keep], coverage[keep]
+            self.framebuffer.accumulate(xs, ys, coverage)
+        elif self.backend == "Canvas" and self.spans_var.get() and self.algorithm != "Wu":
+            self.draw_spans(segment, steps)
+        else:
+            for x, y, c in self.line_pixels(*segment, steps):
+                self.plot(x, y, c)
+
+        if self.framebuffer is not None:
+            self.framebuffer.blit()
+
+    def draw_spans(self, segment, steps=None):
+        """Выводит отрезок сериями пикселей: один прямоугольник на строку или столбец."""
+        x1, y1, x2, y2 = segment
+        pixels = [(int(x), int(y)) for x, y, _ in self.line_pixels(*segment, steps)
+                  if (int(x), int(y)) != self.shared_vertex]
+        if not pixels:
+            return
+        vertical = abs(y2 - y1) > abs(x2 - x1)
+        for x, y, length in zip(*pixels_to_spans(*zip(*pixels), vertical)):
+            if vertical:
+                self.canvas.create_rectangle(x, y, x + 1, y + length, fill="black", outline="", tags="line")
+            else:
+                self.canvas.create_rectangle(x, y, x + length, y + 1, fill="black", outline="", tags="line")
+
+    def line_pixels(self, x1, y1, x2, y2, steps=None):
+        """Пиксели отрезка выбранным алгоритмом: тройки (x, y, покрытие или None).
 
+        steps — первый и последний выводимый шаг по ведущей оси, отсчитанные от (x1, y1)
+        (см. clip_segment); None — весь отрезок. Шаги до первого только продвигают алгоритм,
+        поэтому выводятся те же пиксели, что и у целого отрезка.
+        """
+        if steps is None:
+            steps = (0, max(abs(x2 - x1), abs(y2 - y1)))
         if self.algorithm == "CDA":
-            self.draw_cda()
+            return self.cda_pixels(x1, y1, x2, y2, *steps)
         elif self.algorithm == "Bresenham":
-            self.draw_bresenham()
+            return self.bresenham_pixels(x1, y1, x2, y2, *steps)
         elif self.algorithm == "Wu":
-            self.draw_wu()
+            return self.wu_pixels(x1, y1, x2, y2, *steps)
+        return iter(())
 
-    def draw_cda(self):
-        dx = self.end_x - self.start_x
-        dy = self.end_y - self.start_y
+    def cda_pixels(self, x1, y1, x2, y2, first, last):
+        dx = x2 - x1
+        dy = y2 - y1
         steps = max(abs(dx), abs(dy))
 
         if steps == 0:
@@ -152,27 +355,25 @@ class LineEditor(tk.Tk):
 
         x_inc = dx / steps
         y_inc = dy / steps
-        x, y = self.start_x, self.start_y
+        x, y = x1, y1
 
-        for _ in range(steps + 1):
-            self.canvas.create_oval(x, y, x + 1, y + 1,
-                                    fill="black", tags="line")
+        for i in range(last + 1):
+            if i >= first:
+                yield x, y, None
             x += x_inc
             y += y_inc
 
-    def draw_bresenham(self):
-        x1, y1 = self.start_x, self.start_y
-        x2, y2 = self.end_x, self.end_y
-
+    def bresenham_pixels(self, x1, y1, x2, y2, first, last):
         dx = abs(x2 - x1)
         dy = abs(y2 - y1)
         sx = 1 if x1 < x2 else -1
         sy = 1 if y1 < y2 else -1
         err = dx - dy
 
-        while True:
-            self.canvas.create_oval(x1, y1, x1 + 1, y1 + 1,
-                                    fill="black", tags="line")
+        # Каждая итерация — один шаг по ведущей оси
+        for i in range(last + 1):
+            if i >= first:
+                yield x1, y1, None
 
             if x1 == x2 and y1 == y2:
                 break
@@ -185,16 +386,7 @@ class LineEditor(tk.Tk):
                 err += dx
                 y1 += sy
 
-    def draw_wu(self):
-        x1, y1 = self.start_x, self.start_y
-        x2, y2 = self.end_x, self.end_y
-
-        def plot(x, y, c):
-            intensity = int(255 * (1 - c))
-            color = f"#{intensity:02x}{intensity:02x}{intensity:02x}"
-            self.canvas.create_oval(x, y, x + 1, y + 1,
-                                    fill=color, outline="", tags="line")
-
+    def wu_pixels(self, x1, y1, x2, y2, first, last):
         steep = abs(y2 - y1) > abs(x2 - x1)
         if steep:
             x1, y1 = y1, x1
@@ -203,6 +395,8 @@ class LineEditor(tk.Tk):
         if x1 > x2:
             x1, x2 = x2, x1
             y1, y2 = y2, y1
+            # Шаги отсчитываются от нового первого конца
+            first, last = x2 - x1 - last, x2 - x1 - first
 
         dx = x2 - x1
         dy = y2 - y1
@@ -215,12 +409,13 @@ class LineEditor(tk.Tk):
         xpxl1 = xend
         ypxl1 = int(yend)
 
-        if steep:
-            plot(ypxl1, xpxl1, 1 - (yend % 1) * xgap)
-            plot(ypxl1 + 1, xpxl1, (yend % 1) * xgap)
-        else:
-            plot(xpxl1, ypxl1, 1 - (yend % 1) * xgap)
-            plot(xpxl1, ypxl1 + 1, (yend % 1) * xgap)
+        if first <= 0:
+            if steep:
+                yield ypxl1, xpxl1, 1 - (yend % 1) * xgap
+                yield ypxl1 + 1, xpxl1, (yend % 1) * xgap
+            else:
+                yield xpxl1, ypxl1, 1 - (yend % 1) * xgap
+                yield xpxl1, ypxl1 + 1, (yend % 1) * xgap
 
         intery = yend + gradient
 
@@ -231,21 +426,23 @@ class LineEditor(tk.Tk):
         xpxl2 = xend
         ypxl2 = int(yend)
 
-        if steep:
-            plot(ypxl2, xpxl2, 1 - (yend % 1) * xgap)
-            plot(ypxl2 + 1, xpxl2, (yend % 1) * xgap)
-        else:
-            plot(xpxl2, ypxl2, 1 - (yend % 1) * xgap)
-            plot(xpxl2, ypxl2 + 1, (yend % 1) * xgap)
-
-        # Основной цикл
-        for x in range(xpxl1 + 1, xpxl2):
+        if last >= xpxl2 - xpxl1:
             if steep:
-                plot(int(intery), x, 1 - (intery % 1))
-                plot(int(intery) + 1, x, intery % 1)
+                yield ypxl2, xpxl2, 1 - (yend % 1) * xgap
+                yield ypxl2 + 1, xpxl2, (yend % 1) * xgap
             else:
-                plot(x, int(intery), 1 - (intery % 1))
-                plot(x, int(intery) + 1, intery % 1)
+                yield xpxl2, ypxl2, 1 - (yend % 1) * xgap
+                yield xpxl2, ypxl2 + 1, (yend % 1) * xgap
+
+        # Основной цикл
+        for x in range(xpxl1 + 1, min(xpxl2, xpxl1 + last + 1)):
+            if x - xpxl1 >= first:
+                if steep:
+                    yield int(intery), x, 1 - (intery % 1)
+                    yield int(intery) + 1, x, intery % 1
+                else:
+                    yield x, int(intery), 1 - (intery % 1)
+                    yield x, int(intery) + 1, intery % 1
             intery += gradient
 
 
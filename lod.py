@@ -0,0 +1,143 @@
+"""Уровни детализации сетки для просмотрщика lab4.py.
+
+Упрощённые сетки строятся при загрузке кластеризацией вершин: пространство модели
+делится на кубические ячейки, вершины одной ячейки сливаются в их среднее, а треугольники,
+у которых совпали вершины, исчезают. Каждый следующий уровень строится из предыдущего
+с вдвое большей ячейкой, пока граней не станет меньше MIN_FACES; первая ячейка вдвое
+длиннее среднего ребра исходной сетки, так что уже первый уровень заметно проще.
+
+Построенные уровни сохраняются рядом с моделью (`<файл>.lodcache`), как и кэш сетки
+в mesh_io, и при следующем открытии отображаются в память.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from mesh_io import (CACHE_ARRAYS, Mesh, compact, face_winding, load_arrays, read_mesh, save_arrays, source_key,
+                     triangulate, unique_edges)
+
+CACHE_SUFFIX = ".lodcache"
+# Номер формата кэша уровней: меняется при изменении правил упрощения
+CACHE_VERSION = 1
+
+# Пределы числа ячеек по наибольшему размеру модели для первого уровня
+# (номер ячейки по оси упаковывается в 21 бит)
+MIN_RESOLUTION = 16
+MAX_RESOLUTION = 1 << 20
+# Сетки проще этой не упрощаются
+MIN_FACES = 2000
+# Новый уровень сохраняется, только если в нём не больше этой доли граней предыдущего
+MIN_REDUCTION = 0.5
+# Ошибка упрощения (размер ячейки на экране), которую не видно, пикселей
+PIXEL_TOLERANCE = 1.0
+
+
+class Level(NamedTuple):
+    """Уровень детализации: сетка, размер ячейки кластеризации в единицах модели (0 — исходная)
+    и обход её граней, определённый face_winding."""
+    mesh: Mesh
+    cell: float = 0.0
+    winding: int = 0
+
+
+def cluster_vertices(mesh, cell, origin):
+    """Упрощает сетку кластеризацией вершин в ячейках размера cell, отсчитанных от точки origin.
+
+    Возвращает сетку из треугольников: вырожденные и повторяющиеся треугольники удаляются,
+    неиспользуемые вершины отбрасываются.
+    """
+    vertices = np.asarray(mesh.vertices, dtype=np.float64)
+    cells = np.floor((vertices - origin) / cell).astype(np.int64)
+    keys = cells[:, 0] << 42 | cells[:, 1] << 21 | cells[:, 2]
+    _, cluster = np.unique(keys, return_inverse=True)
+    cluster = cluster.reshape(-1)
+
+    triangles = mesh.triangles if mesh.triangles is not None else triangulate(mesh)
+    triangles = cluster[triangles]
+    a, b, c = triangles.T
+    triangles = triangles[(a != b) & (b != c) & (a != c)]
+    # Из треугольников с одинаковым набором вершин остаётся первый; тройка номеров
+    # упаковывается в одно число, если номера кластеров помещаются в 21 бит
+    ordered = np.sort(triangles, axis=1)
+    if cluster.max(initial=0) < 1 << 21:
+        ordered = ordered[:, 0] << 42 | ordered[:, 1] << 21 | ordered[:, 2]
+    _, first = np.unique(ordered, axis=0 if ordered.ndim == 2 else None, return_index=True)
+    triangles = triangles[np.sort(first)]
+
+    used, triangles = np.unique(triangles, return_inverse=True)
+    triangles = triangles.reshape(-1, 3)
+    counts = np.bincount(cluster)[used]
+    merged = np.stack([np.bincount(cluster, weights=vertices[:, k])[used] for k in range(3)], axis=1)
+    merged /= counts[:, None]
+
+    offsets = np.arange(0, 3 * len(triangles) + 1, 3)
+    return compact(Mesh(merged, triangles.reshape(-1), offsets, triangles=triangles))
+
+
+def build_levels(mesh, min_faces=MIN_FACES):
+    """Пирамида уровней детализации от исходной сетки к самой простой."""
+    levels = [Level(mesh, 0.0, face_winding(mesh))]
+    if mesh.face_count <= min_faces or len(mesh.vertices) == 0:
+        return tuple(levels)
+
+    vertices = np.asarray(mesh.vertices, dtype=np.float64)
+    # Ячейки соседних уровней вложены друг в друга, поэтому уровень строится из предыдущего
+    origin = vertices.min(axis=0)
+    extent = float(np.ptp(vertices, axis=0).max())
+    edges = vertices[mesh.edges if mesh.edges is not None else unique_edges(mesh)]
+    edge_length = np.linalg.norm(edges[:, 1] - edges[:, 0], axis=1).mean() if len(edges) else 0.0
+    cell = min(max(2 * edge_length, extent / MAX_RESOLUTION), extent / MIN_RESOLUTION)
+    while levels[-1].mesh.face_count > min_faces and 0 < cell <= extent:
+        simple = cluster_vertices(levels[-1].mesh, cell, origin)
+        if simple.face_count <= levels[-1].mesh.face_count * MIN_REDUCTION:
+            levels.append(Level(simple, cell, face_winding(simple)))
+        cell *= 2
+    return tuple(levels)
+
+
+def _levels_key(filename):
+    # Кэш уровней зависит и от формата кэша сетки, и от правил упрощения
+    return np.append(source_key(filename), CACHE_VERSION)
+
+
+def write_cache(filename, levels):
+    """Сохраняет уровни модели: таблицу (ячейка, обход) и массивы упрощённых сеток (без уровня 0)."""
+    table = np.array([(level.cell, level.winding) for level in levels], dtype=np.float64)
+    arrays = [table] + [getattr(level.mesh, name) for level in levels[1:] for name in CACHE_ARRAYS]
+    save_arrays(filename + CACHE_SUFFIX, _levels_key(filename), arrays)
+
+
+def read_cache(filename, mesh):
+    """Уровни модели из кэша с исходной сеткой mesh на уровне 0; None, если кэш устарел."""
+    arrays = load_arrays(filename + CACHE_SUFFIX, _levels_key(filename))
+    if arrays is None or len(arrays) != 1 + (len(arrays[0]) - 1) * len(CACHE_ARRAYS):
+        return None
+    table, count = arrays[0], len(CACHE_ARRAYS)
+    meshes = [mesh] + [Mesh(*arrays[i:i + count]) for i in range(1, len(arrays), count)]
+    return tuple(Level(mesh, float(cell), int(winding)) for mesh, (cell, winding) in zip(meshes, table))
+
+
+def load_levels(filename, use_cache=True):
+    """Читает модель и её уровни детализации, по возможности из кэша; уровень 0 — исходная сетка."""
+    mesh = read_mesh(filename, use_cache)
+    if use_cache:
+        levels = read_cache(filename, mesh)
+        if levels is not None:
+            return levels
+    levels = build_levels(mesh)
+    if use_cache:
+        write_cache(filename, levels)
+    return levels
+
+
+def choose_level(levels, face_cost, budget, pixel_scale, tolerance=PIXEL_TOLERANCE):
+    """Номер уровня для кадра во время взаимодействия.
+
+    face_cost — время отрисовки одной грани (с), budget — бюджет кадра (с), pixel_scale —
+    число пикселей экрана на единицу модели. Берётся самый подробный уровень, который
+    укладывается в бюджет, либо более простой, если его упрощение на экране ещё не видно.
+    """
+    fits = [i for i, level in enumerate(levels) if level.mesh.face_count * face_cost <= budget]
+    index = fits[0] if fits else len(levels) - 1
+    unseen = [i for i, level in enumerate(levels) if level.cell * pixel_scale <= tolerance]
+    return max(index, unseen[-1])
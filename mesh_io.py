@@ -0,0 +1,365 @@
+"""Чтение моделей для lab4.py: собственный текстовый формат и Wavefront OBJ.
+
+Собственный формат: строки вершин `x y z`, затем пустая строка или строка с `#`,
+затем грани — номера вершин с нуля, по строке на грань. В OBJ учитываются строки
+`v` и `f` (номера с единицы, отрицательные — от конца, `v/vt/vn` допускается).
+Грани могут иметь разное число вершин.
+
+Разобранная модель сохраняется рядом с исходным файлом (`<файл>.meshcache`) как
+последовательность массивов .npy; при следующем открытии кэш отображается в память.
+"""
+import os
+import re
+import warnings
+from typing import NamedTuple
+
+import numpy as np
+
+from rasterizers import ragged_index
+
+CACHE_SUFFIX = ".meshcache"
+# Номер формата кэша: меняется при изменении набора массивов или правил разбора
+CACHE_VERSION = 4
+CACHE_ARRAYS = ("vertices", "indices", "offsets", "edges", "triangles")
+
+WHITESPACE = np.frombuffer(b" \t\r\n", dtype=np.uint8)
+
+
+class Mesh(NamedTuple):
+    """Модель: вершины (N, 3) float32 и грани в сжатом виде.
+
+    Вершины грани k — indices[offsets[k]:offsets[k + 1]]; edges (E, 2) — рёбра без повторов;
+    triangles (T, 3) — грани, разбитые веером на треугольники (грань k даёт face_sizes[k] - 2 из них).
+    """
+    vertices: np.ndarray
+    indices: np.ndarray
+    offsets: np.ndarray
+    edges: np.ndarray = None
+    triangles: np.ndarray = None
+
+    @property
+    def face_count(self):
+        return len(self.offsets) - 1
+
+    @property
+    def face_sizes(self):
+        return np.diff(self.offsets)
+
+    def triangle_faces(self):
+        """Номер грани для каждого треугольника из triangles."""
+        return np.repeat(np.arange(self.face_count), self.face_sizes - 2)
+
+    def faces(self, values=None):
+        """Грани: номера вершин или, если задано, строки values по этим номерам.
+
+        Если все грани одной арности, возвращается массив (F, k, ...), иначе список массивов.
+        """
+        data = self.indices if values is None else values[self.indices]
+        sizes = self.face_sizes
+        if len(sizes) and (sizes == sizes[0]).all():
+            return data.reshape((len(sizes), sizes[0]) + data.shape[1:])
+        return np.split(data, self.offsets[1:-1])
+
+    def following(self):
+        """Для каждой позиции в indices — позиция следующей вершины той же грани (по кругу)."""
+        following = np.arange(1, len(self.indices) + 1)
+        following[self.offsets[1:] - 1] = self.offsets[:-1]
+        return following
+
+
+def face_normals(mesh, vertices):
+    """Ненормированные нормали граней (F, 3) по формуле Ньюэлла — для многоугольников любой арности.
+
+    Нормаль направлена так, что с её стороны обход грани виден против часовой стрелки.
+    """
+    a = vertices[mesh.indices]
+    b = vertices[mesh.indices[mesh.following()]]
+    terms = np.stack(((a[:, 1] - b[:, 1]) * (a[:, 2] + b[:, 2]),
+                      (a[:, 2] - b[:, 2]) * (a[:, 0] + b[:, 0]),
+                      (a[:, 0] - b[:, 0]) * (a[:, 1] + b[:, 1])), axis=1)
+    return np.add.reduceat(terms, mesh.offsets[:-1], axis=0)
+
+
+def face_centers(mesh, vertices):
+    """Центры граней (F, 3) — среднее их вершин."""
+    return np.add.reduceat(vertices[mesh.indices], mesh.offsets[:-1], axis=0) / mesh.face_sizes[:, None]
+
+
+def face_winding(mesh):
+    """Обход граней относительно внешней стороны замкнутой сетки, в пространстве модели.
+
+    1 — снаружи грани видны обходом против часовой стрелки, -1 — по часовой, 0 — у сетки
+    есть рёбра, принадлежащие одной грани (она не замкнута), и внешнюю сторону определить нельзя.
+    """
+    a, b = mesh.indices, mesh.indices[mesh.following()]
+    keys = np.sort(np.minimum(a, b).astype(np.int64) << 32 | np.maximum(a, b))
+    bounds = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1], [True])))
+    if len(keys) == 0 or (np.diff(bounds) == 1).any():
+        return 0
+    # Знак объёма, ограниченного сеткой: при нормалях наружу он положителен
+    vertices = np.asarray(mesh.vertices, dtype=np.float64)
+    volume = np.einsum("ij,ij->", face_centers(mesh, vertices), face_normals(mesh, vertices))
+    return 1 if volume >= 0 else -1
+
+
+def _row_lengths(block):
+    """Число чисел в каждой непустой строке блока байтов."""
+    buf = np.frombuffer(block, dtype=np.uint8)
+    space = buf <= ord(" ")
+    starts = ~space
+    starts[1:] &= space[:-1]
+    # Число начал чисел между соседними переводами строки
+    bounds = np.concatenate(([0], np.flatnonzero(buf == ord("\n")), [len(buf)]))
+    counts = np.diff(np.searchsorted(np.flatnonzero(starts), bounds))
+    return counts[counts > 0]
+
+
+def _strip_comments(data):
+    """Заменяет комментарии от # до конца строки пробелами; без комментариев возвращает data."""
+    if b"#" not in data:
+        return data
+    text = bytearray(data)
+    buf = np.frombuffer(text, dtype=np.uint8)
+    hashes = np.flatnonzero(buf == ord("#"))
+    newlines = np.flatnonzero(buf == ord("\n"))
+    # Комментарий начинается с первого # в строке и идёт до её перевода строки
+    line = np.searchsorted(newlines, hashes)
+    first = np.concatenate(([True], line[1:] != line[:-1]))
+    hashes = hashes[first]
+    lengths = np.append(newlines, len(buf))[line[first]] - hashes
+    buf[np.repeat(hashes - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())] = ord(" ")
+    return text
+
+
+def _select_lines(data, keyword):
+    """Строки, начинающиеся с keyword и пробела, с ключевым словом, заменённым на пробелы.
+
+    Пробелы в начале строки допускаются.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(buf == ord("\n"))
+    starts = np.concatenate(([0], newlines + 1))
+    lengths = np.diff(np.append(starts, len(buf)))
+    # Начало строки без ведущих пробелов и табуляций
+    text = np.flatnonzero((buf != ord(" ")) & (buf != ord("\t")))
+    first = np.append(text, len(buf))[np.searchsorted(text, starts)]
+    indent = first - starts
+    keep = lengths > indent + len(keyword)
+    for k, char in enumerate(keyword):
+        keep[keep] = buf[first[keep] + k] == char
+    keep[keep] = np.isin(buf[first[keep] + len(keyword)], (ord(" "), ord("\t")))
+
+    selected = buf[np.repeat(keep, lengths)]
+    kept = lengths[keep]
+    line_starts = np.cumsum(kept) - kept + indent[keep]
+    selected[line_starts[:, None] + np.arange(len(keyword))] = ord(" ")
+    # Последняя строка файла может быть без перевода строки
+    return selected.tobytes() + b"\n"
+
+
+def _parse_rows(block, dtype):
+    """Разбирает блок чисел, разделённых пробелами; возвращает (значения, длины строк)."""
+    counts = _row_lengths(block)
+    try:
+        with warnings.catch_warnings():
+            # Старые версии NumPy при ошибке разбора не бросают исключение, а выдают предупреждение
+            warnings.simplefilter("ignore", DeprecationWarning)
+            values = np.fromstring(block.decode("ascii"), dtype=dtype, sep=" ")
+    except ValueError:
+        values = None
+    if values is None or len(values) != counts.sum():
+        raise ValueError("Invalid number in object file.")
+    return values, counts
+
+
+def _first_parts(block):
+    """Для ссылок вида v/vt/vn возвращает только номера вершин и число ссылок в строках."""
+    buf = np.frombuffer(block, dtype=np.uint8)
+    space = buf <= ord(" ")
+    separator = space | (buf == ord("/"))
+    token_starts = ~space
+    token_starts[1:] &= space[:-1]
+    part_starts = ~separator
+    part_starts[1:] &= separator[:-1]
+    values, _ = _parse_rows(block.replace(b"/", b" "), np.int64)
+    # Номер вершины — первая часть ссылки; пустые части (v//vn) чисел не дают
+    first = np.searchsorted(np.flatnonzero(part_starts), np.flatnonzero(token_starts))
+    return values[first], _row_lengths(block)
+
+
+def _faces_from_rows(values, counts):
+    if (counts < 3).any():
+        raise ValueError("Face with fewer than 3 vertices.")
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return values, offsets
+
+
+def parse_custom(data):
+    """Разбор собственного текстового формата lab4.py."""
+    split = re.search(rb"^(#|[ \t\r]*$)", data, re.M)
+    if split is None:
+        raise ValueError("Invalid object file format or empty content.")
+    vertex_block = data[:split.start()]
+    face_block = re.sub(rb"^#[^\n]*", b"", data[split.start():], flags=re.M)
+
+    values, counts = _parse_rows(vertex_block, np.float64)
+    if (counts != 3).any():
+        raise ValueError("Invalid vertex format.")
+    indices, offsets = _faces_from_rows(*_parse_rows(face_block, np.int64))
+    return Mesh(values.reshape(-1, 3).astype(np.float32), indices, offsets)
+
+
+def parse_obj(data):
+    """Разбор Wavefront OBJ: вершины `v` и многоугольные грани `f`."""
+    data = _strip_comments(data)
+    values, counts = _parse_rows(_select_lines(data, b"v"), np.float64)
+    if (counts < 3).any():
+        raise ValueError("Invalid vertex format.")
+    # У вершины могут быть w или цвет — берём первые три числа строки
+    starts = np.cumsum(counts) - counts
+    vertices = values[starts[:, None] + np.arange(3)].astype(np.float32)
+
+    face_block = _select_lines(data, b"f")
+    if b"/" in face_block:
+        indices, counts = _first_parts(face_block)
+    else:
+        indices, counts = _parse_rows(face_block, np.int64)
+    indices, offsets = _faces_from_rows(indices, counts)
+
+    if (indices < 0).any():
+        # Отрицательный номер отсчитывается от вершин, объявленных до этой грани
+        v_pos = [m.start() for m in re.finditer(rb"^[ \t]*v[ \t]", data, re.M)]
+        f_pos = [m.start() for m in re.finditer(rb"^[ \t]*f[ \t]", data, re.M)]
+        defined = np.repeat(np.searchsorted(v_pos, f_pos), np.diff(offsets))
+        indices = np.where(indices < 0, defined + indices, indices - 1)
+    else:
+        indices = indices - 1
+    return Mesh(vertices, indices, offsets)
+
+
+def validate(mesh):
+    if len(mesh.vertices) == 0 or mesh.face_count == 0:
+        raise ValueError("Invalid object file format or empty content.")
+    if mesh.indices.min() < 0 or mesh.indices.max() >= len(mesh.vertices):
+        raise ValueError("Invalid face indices.")
+
+
+def unique_edges(mesh):
+    """Рёбра граней без повторов: пары номеров вершин (E, 2), меньший номер первым.
+
+    Общее ребро соседних граней попадает в список один раз, вырожденные рёбра отбрасываются.
+    """
+    a, b = mesh.indices, mesh.indices[mesh.following()]
+    low = np.minimum(a, b).astype(np.int64)
+    high = np.maximum(a, b).astype(np.int64)
+    # Сортировка с отбором соседних различных быстрее np.unique, которому без return_inverse
+    # NumPy 2 выбирает хеш-таблицу
+    keys = np.sort((low << 32) | high)
+    keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    low, high = keys >> 32, keys & 0xFFFFFFFF
+    return np.stack((low, high), axis=1)[low != high].astype(np.int32)
+
+
+def select_faces(mesh, faces):
+    """Номера вершин и границы граней из списка faces — в том же сжатом виде, что у Mesh."""
+    sizes = mesh.face_sizes[faces]
+    face, step = ragged_index(sizes)
+    offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    return mesh.indices[mesh.offsets[faces][face] + step], offsets
+
+
+def triangulate(mesh):
+    """Веерное разбиение граней на треугольники (v0, vj, vj+1) — верно для выпуклых граней."""
+    face, step = ragged_index(mesh.face_sizes - 2)
+    first = mesh.offsets[:-1][face]
+    return np.stack((mesh.indices[first], mesh.indices[first + step + 1], mesh.indices[first + step + 2]), axis=1)
+
+
+def compact(mesh):
+    """Приводит массивы к типам хранения, строит список рёбер и делает массивы только для чтения."""
+    edges = mesh.edges if mesh.edges is not None else unique_edges(mesh)
+    triangles = mesh.triangles if mesh.triangles is not None else triangulate(mesh)
+    arrays = (np.array(mesh.vertices, dtype=np.float32), np.array(mesh.indices, dtype=np.int32),
+              np.array(mesh.offsets, dtype=np.int64), np.array(edges, dtype=np.int32),
+              np.array(triangles, dtype=np.int32))
+    for array in arrays:
+        array.flags.writeable = False
+    return Mesh(*arrays)
+
+
+def cache_path(filename):
+    return filename + CACHE_SUFFIX
+
+
+def source_key(filename, version=CACHE_VERSION):
+    """Ключ кэша: номер формата, время изменения и размер исходного файла."""
+    stat = os.stat(filename)
+    return np.array([version, stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+
+def save_arrays(path, key, arrays):
+    """Записывает ключ и массивы подряд в формате .npy; при ошибке записи файл не создаётся."""
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "wb") as file:
+            np.lib.format.write_array(file, key)
+            for array in arrays:
+                np.lib.format.write_array(file, array)
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def load_arrays(path, key):
+    """Массивы файла save_arrays, отображённые в память; None, если файла нет или ключ не совпал."""
+    try:
+        size = os.path.getsize(path)
+        with open(path, "rb") as file:
+            if not np.array_equal(np.lib.format.read_array(file), key):
+                return None
+            arrays = []
+            while file.tell() < size:
+                np.lib.format.read_magic(file)
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+                offset = file.tell()
+                if np.prod(shape) == 0:
+                    arrays.append(np.empty(shape, dtype=dtype))
+                else:
+                    arrays.append(np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape))
+                file.seek(offset + int(np.prod(shape)) * dtype.itemsize)
+    except (OSError, ValueError):
+        return None
+    return arrays
+
+
+def write_cache(filename, mesh):
+    """Сохраняет модель рядом с исходным файлом; при ошибке записи кэш просто не создаётся."""
+    save_arrays(cache_path(filename), source_key(filename), [getattr(mesh, name) for name in CACHE_ARRAYS])
+
+
+def read_cache(filename):
+    """Отображает кэш модели в память; None, если кэша нет или исходный файл изменился."""
+    arrays = load_arrays(cache_path(filename), source_key(filename))
+    if arrays is None or len(arrays) != len(CACHE_ARRAYS):
+        return None
+    return Mesh(*arrays)
+
+
+def read_mesh(filename, use_cache=True):
+    """Читает модель, по возможности из кэша; формат определяется по расширению (.obj или свой)."""
+    if use_cache:
+        mesh = read_cache(filename)
+        if mesh is not None:
+            return mesh
+
+    with open(filename, "rb") as file:
+        data = file.read()
+    parse = parse_obj if filename.lower().endswith(".obj") else parse_custom
+    mesh = compact(parse(data))
+    validate(mesh)
+    if use_cache:
+        write_cache(filename, mesh)
+    return mesh
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from rasterizers import RASTERIZERS, as_segments, ragged_index
+
+
+def pattern_lengths(algorithm, dx, dy):
+    """Число пикселей, которое алгоритм выводит для отрезка (0, 0, dx, dy)."""
+    major = np.maximum(np.abs(dx), np.abs(dy))
+    if algorithm == "CDA":
+        return np.where(major > 0, major + 1, 0)
+    if algorithm == "Wu":
+        return 4 + 2 * np.maximum(major - 1, 0)
+    return major + 1
+
+
+class PatternCache:
+    """LRU-кэш шаблонов отрезков по ключу (алгоритм, dx, dy).
+
+    Набор пикселей отрезка зависит только от (dx, dy): шаблон считается один раз
+    от начала координат и сдвигается в начальную точку каждого отрезка. Для
+    Брезенхема результат точно совпадает с прямой растеризацией; у ЦДА и Ву
+    сумма с плавающей точкой накапливается от другой начальной точки, и там, где
+    точное значение попадает ровно на границу пикселя (например, dy/dx = 3/10),
+    ошибка округления может уйти в другую сторону и сместить пиксель на единицу.
+    Совпадение рассчитано на неотрицательные координаты (после отсечения по растру).
+    """
+
+    def __init__(self, max_bytes=64 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.patterns = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def __repr__(self):
+        return (f"шаблонов: {len(self)}, {self.size / 2 ** 20:.1f} МБ, попаданий: {self.hits}, "
+                f"промахов: {self.misses}, вытеснено: {self.evictions}")
+
+    def clear(self):
+        self.patterns.clear()
+        self.size = 0
+
+    def _store(self, key, pattern):
+        nbytes = sum(array.nbytes for array in pattern)
+        if nbytes > self.max_bytes:
+            return
+        self.patterns[key] = pattern
+        self.size += nbytes
+        while self.size > self.max_bytes:
+            _, old = self.patterns.popitem(last=False)
+            self.size -= sum(array.nbytes for array in old)
+            self.evictions += 1
+
+    def pattern(self, algorithm, dx, dy):
+        """Смещения пикселей (и покрытия для Ву) от начала отрезка с приращениями (dx, dy)."""
+        return self.patterns_for(algorithm, np.array([dx]), np.array([dy]))[0]
+
+    def patterns_for(self, algorithm, dx, dy):
+        """Шаблоны для набора различных пар (dx, dy); промахи растеризуются одним вызовом."""
+        keys = [(algorithm, int(a), int(b)) for a, b in zip(dx, dy)]
+        result = [None] * len(keys)
+        missing = []
+        for i, key in enumerate(keys):
+            pattern = self.patterns.get(key)
+            if pattern is None:
+                missing.append(i)
+            else:
+                self.patterns.move_to_end(key)
+                result[i] = pattern
+                self.hits += 1
+
+        if missing:
+            mdx, mdy = dx[missing], dy[missing]
+            # Шаблон строится от точки (m, m) с неотрицательными координатами: int() у ЦДА и Ву
+            # округляет к нулю, и около начала координат сдвиг не сохранял бы набор пикселей
+            m = np.maximum(np.abs(mdx), np.abs(mdy)) + 1
+            arrays = RASTERIZERS[algorithm](np.stack((m, m, m + mdx, m + mdy), axis=1))
+            lengths = pattern_lengths(algorithm, mdx, mdy)
+            bounds = np.cumsum(lengths)[:-1]
+            origin = np.repeat(m, lengths)
+            parts = [np.split(array, bounds) for array in (arrays[0] - origin, arrays[1] - origin) + arrays[2:]]
+            for j, i in enumerate(missing):
+                pattern = (parts[0][j].astype(np.int32), parts[1][j].astype(np.int32)) + \
+                          tuple(part[j].copy() for part in parts[2:])
+                result[i] = pattern
+                self._store(keys[i], pattern)
+        self.misses += len(missing)
+        return result
+
+    def rasterize(self, algorithm, segments):
+        """То же, что RASTERIZERS[algorithm](segments), но через кэш шаблонов."""
+        seg = as_segments(segments)
+        if len(seg) == 0:
+            return RASTERIZERS[algorithm](seg)
+        x1, y1 = seg[:, 0], seg[:, 1]
+        dx, dy = seg[:, 2] - x1, seg[:, 3] - y1
+
+        # Пара (dx, dy) упаковывается в одно число: np.unique по одномерному массиву быстрее
+        packed, inverse = np.unique((dx << 32) + (dy + 2 ** 31), return_inverse=True)
+        inverse = inverse.reshape(-1)
+        patterns = self.patterns_for(algorithm, packed >> 32, (packed & 0xFFFFFFFF) - 2 ** 31)
+        # Повторы одной пары (dx, dy) в порции тоже обслуживаются готовым шаблоном
+        self.hits += len(seg) - len(packed)
+
+        lengths = np.array([len(pattern[0]) for pattern in patterns], dtype=np.int64)
+        starts = np.cumsum(lengths) - lengths
+        columns = [np.concatenate([pattern[k] for pattern in patterns]) for k in range(3 if algorithm == "Wu" else 2)]
+
+        segment, step = ragged_index(lengths[inverse])
+        index = starts[inverse[segment]] + step
+        xs = columns[0][index] + x1[segment]
+        ys = columns[1][index] + y1[segment]
+        if algorithm == "Wu":
+            return xs, ys, columns[2][index]
+        return xs, ys
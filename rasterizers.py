@@ -0,0 +1,292 @@
+import numpy as np
+
+# Сколько отрезков одинаковой (после сортировки) длины обрабатывается одной матрицей
+CHUNK = 1024
+
+
+def as_segments(segments):
+    """Приводит отрезки к массиву (N, 4) целых координат x1, y1, x2, y2."""
+    segments = np.asarray(segments)
+    if segments.ndim == 1:
+        segments = segments.reshape(1, -1)
+    if segments.ndim != 2 or segments.shape[1] != 4:
+        raise ValueError(f"Ожидается массив отрезков формы (N, 4), получено {segments.shape}")
+    if not np.issubdtype(segments.dtype, np.integer):
+        segments = np.rint(segments)
+    return segments.astype(np.int64)
+
+
+def _ragged_accumulate(start, step, counts):
+    """Последовательно накапливает start, start + step, ... (counts значений на отрезок).
+
+    Суммирование идёт тем же порядком, что и `x += x_inc` в попиксельном цикле,
+    поэтому ошибки округления совпадают. Результат упорядочен по отрезкам.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    out = np.empty(offsets[-1], dtype=np.float64)
+
+    order = np.argsort(counts, kind="stable")
+    for begin in range(0, len(order), CHUNK):
+        idx = order[begin:begin + CHUNK]
+        width = int(counts[idx].max()) if len(idx) else 0
+        if width == 0:
+            continue
+        values = np.empty((len(idx), width), dtype=np.float64)
+        values[:, 0] = start[idx]
+        values[:, 1:] = step[idx, None]
+        np.add.accumulate(values, axis=1, out=values)
+
+        column = np.arange(width)
+        mask = column < counts[idx, None]
+        positions = offsets[idx, None] + column
+        out[positions[mask]] = values[mask]
+    return out
+
+
+def ragged_index(counts):
+    """Для каждого будущего пикселя возвращает номер отрезка и номер шага в нём."""
+    counts = np.asarray(counts, dtype=np.int64)
+    segment = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    step = np.arange(counts.sum()) - np.repeat(starts, counts)
+    return segment, step
+
+
+def _step_ranges(major, ranges):
+    """Первый шаг по ведущей оси и число шагов каждого отрезка.
+
+    Без ranges — весь отрезок (шаги 0 .. major), иначе шаги ranges[:, 0] .. ranges[:, 1]
+    включительно, отсчитанные от первого конца (см. clipping.clip_steps).
+    """
+    if ranges is None:
+        return np.zeros_like(major), major + 1
+    ranges = np.asarray(ranges, dtype=np.int64).reshape(-1, 2)
+    first = np.clip(ranges[:, 0], 0, major)
+    last = np.clip(ranges[:, 1], -1, major)
+    return first, np.maximum(last - first + 1, 0)
+
+
+def rasterize_dda(segments, ranges=None):
+    """ЦДА для набора отрезков (как LineEditor.draw_cda в lab1.py).
+
+    Возвращает плоские массивы xs, ys; нулевые отрезки пикселей не дают. С ranges выводятся
+    только шаги из диапазонов; накопление начинается с x1 + first * x_inc, и там, где сумма
+    приращений попадает ровно на границу пикселя, пиксель может сдвинуться на единицу.
+    """
+    seg = as_segments(segments)
+    x1, y1, x2, y2 = seg.T
+    dx, dy = x2 - x1, y2 - y1
+    steps = np.maximum(np.abs(dx), np.abs(dy))
+    first, counts = _step_ranges(steps, ranges)
+    counts = np.where(steps > 0, counts, 0)
+    safe = np.where(steps > 0, steps, 1)
+
+    xs = _ragged_accumulate(x1 + first * (dx / safe), dx / safe, counts)
+    ys = _ragged_accumulate(y1 + first * (dy / safe), dy / safe, counts)
+    return xs.astype(np.int64), ys.astype(np.int64)
+
+
+def rasterize_bresenham(segments, ranges=None):
+    """Брезенхем для набора отрезков (как LineEditor.draw_bresenham в lab1.py).
+
+    Смещение по ведомой оси на шаге k равно floor((2*d*k + D) / (2*D)) — это
+    замкнутая форма условия `e >= 0` из пошагового алгоритма, поэтому с ranges
+    выводятся ровно те же пиксели шагов из диапазонов.
+    """
+    seg = as_segments(segments)
+    x1, y1, x2, y2 = seg.T
+    adx, ady = np.abs(x2 - x1), np.abs(y2 - y1)
+    sx = np.where(x1 < x2, 1, -1)
+    sy = np.where(y1 < y2, 1, -1)
+    steep = ady > adx
+    major = np.where(steep, ady, adx)
+    minor = np.where(steep, adx, ady)
+
+    first, counts = _step_ranges(major, ranges)
+    segment, k = ragged_index(counts)
+    k += first[segment]
+    big = major[segment]
+    offset = (2 * minor[segment] * k + big) // np.maximum(2 * big, 1)
+
+    is_steep = steep[segment]
+    xs = x1[segment] + sx[segment] * np.where(is_steep, offset, k)
+    ys = y1[segment] + sy[segment] * np.where(is_steep, k, offset)
+    return xs, ys
+
+
+def rasterize_wu(segments, ranges=None):
+    """Алгоритм Ву для набора отрезков (как LineEditor.draw_wu в lab5/main.py).
+
+    Возвращает xs, ys и покрытие (1 — полностью закрашенный пиксель) в порядке вывода:
+    две пары пикселей концевых точек, затем пары основного цикла. С ranges выводятся
+    только шаги из диапазонов (концевые пары — если их шаг входит в диапазон); intery
+    начинается с y1 + (k + 1) * gradient, что может отличаться от накопленной суммы
+    в последних разрядах.
+    """
+    seg = as_segments(segments)
+    x1, y1, x2, y2 = seg.T
+    steep = np.abs(y2 - y1) > np.abs(x2 - x1)
+    x1, y1, x2, y2 = (np.where(steep, y1, x1), np.where(steep, x1, y1),
+                      np.where(steep, y2, x2), np.where(steep, x2, y2))
+    swap = x1 > x2
+    x1, y1, x2, y2 = (np.where(swap, x2, x1), np.where(swap, y2, y1),
+                      np.where(swap, x1, x2), np.where(swap, y1, y2))
+
+    dx, dy = x2 - x1, y2 - y1
+    gradient = np.where(dx != 0, dy / np.where(dx != 0, dx, 1), 1.0)
+
+    # Диапазон шагов от первого конца переводится в шаги от левого конца после перестановки
+    first, step_counts = _step_ranges(dx, ranges)
+    last = first + step_counts - 1
+    lo = np.where(swap, dx - last, first)
+    hi = np.where(swap, dx - first, last)
+    any_steps = step_counts > 0
+    with_first = any_steps & (lo <= 0)
+    with_last = any_steps & (hi >= dx)
+    loop_first = np.maximum(lo, 1)
+    loop_counts = np.where(any_steps, np.maximum(np.minimum(hi, dx - 1) - loop_first + 1, 0), 0)
+    ends = 2 * with_first.astype(np.int64) + 2 * with_last
+    counts = ends + 2 * loop_counts
+
+    # Концы целочисленные, поэтому xgap = 0.5, а дробная часть yend равна нулю
+    intery = _ragged_accumulate(y1 + gradient * loop_first, gradient, loop_counts)
+    segment, k = ragged_index(loop_counts)
+
+    main = np.empty(len(segment) * 2, dtype=np.int64)
+    minor = np.empty(len(segment) * 2, dtype=np.int64)
+    coverage = np.empty(len(segment) * 2, dtype=np.float64)
+    base = np.trunc(intery).astype(np.int64)
+    frac = np.mod(intery, 1)
+    main[0::2] = main[1::2] = x1[segment] + loop_first[segment] + k
+    minor[0::2], minor[1::2] = base, base + 1
+    coverage[0::2], coverage[1::2] = 1 - frac, frac
+
+    total = int(counts.sum())
+    out_main = np.empty(total, dtype=np.int64)
+    out_minor = np.empty(total, dtype=np.int64)
+    out_coverage = np.empty(total, dtype=np.float64)
+    starts = np.cumsum(counts) - counts
+    end_pixels = [(with_first, 0, x1, y1, 1.0), (with_first, 1, x1, y1 + 1, 0.0),
+                  (with_last, 2 * with_first, x2, y2, 1.0), (with_last, 2 * with_first + 1, x2, y2 + 1, 0.0)]
+    for present, position, px, py, c in end_pixels:
+        out_main[(starts + position)[present]] = px[present]
+        out_minor[(starts + position)[present]] = py[present]
+        out_coverage[(starts + position)[present]] = c
+    pair_segment, j = ragged_index(2 * loop_counts)
+    loop_positions = starts[pair_segment] + ends[pair_segment] + j
+    out_main[loop_positions] = main
+    out_minor[loop_positions] = minor
+    out_coverage[loop_positions] = coverage
+
+    is_steep = np.repeat(steep, counts)
+    xs = np.where(is_steep, out_minor, out_main)
+    ys = np.where(is_steep, out_main, out_minor)
+    return xs, ys, out_coverage
+
+
+RASTERIZERS = {
+    "CDA": rasterize_dda,
+    "Bresenham": rasterize_bresenham,
+    "Wu": rasterize_wu,
+}
+
+
+def unique_pixels(xs, ys, coverage=None):
+    """Убирает повторы пикселей (для покрытия остаётся максимум), сортируя по строкам."""
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    order = np.lexsort((xs, ys))
+    xs, ys = xs[order], ys[order]
+    first = np.ones(len(xs), dtype=bool)
+    first[1:] = (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1])
+    if coverage is None:
+        return xs[first], ys[first]
+    coverage = np.maximum.reduceat(np.asarray(coverage)[order], np.nonzero(first)[0]) if len(xs) else coverage
+    return xs[first], ys[first], coverage
+
+
+def pixels_to_spans(xs, ys, vertical=False):
+    """Сворачивает пиксели в горизонтальные (или вертикальные) серии.
+
+    Возвращает массивы x, y начала серии и её длину: серия покрывает пиксели
+    x .. x + length - 1 в строке y (для vertical — y .. y + length - 1 в столбце x).
+    """
+    if vertical:
+        ys, xs = unique_pixels(ys, xs)
+        cols, rows = ys, xs
+    else:
+        xs, ys = unique_pixels(xs, ys)
+        cols, rows = xs, ys
+    start = np.ones(len(cols), dtype=bool)
+    start[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1] + 1)
+    begin = np.nonzero(start)[0]
+    length = np.diff(np.append(begin, len(cols)))
+    if vertical:
+        return rows[begin], cols[begin], length
+    return cols[begin], rows[begin], length
+
+
+def rasterize_spans(segments, algorithm="Bresenham"):
+    """Растеризует отрезки ЦДА или Брезенхемом сразу в серии пикселей.
+
+    Пологие отрезки дают горизонтальные серии, крутые — вертикальные.
+    Возвращает пару (горизонтальные, вертикальные), каждая — (x, y, length).
+    """
+    seg = as_segments(segments)
+    steep = np.abs(seg[:, 3] - seg[:, 1]) > np.abs(seg[:, 2] - seg[:, 0])
+    rasterize = RASTERIZERS[algorithm]
+    horizontal = pixels_to_spans(*rasterize(seg[~steep]))
+    vertical = pixels_to_spans(*rasterize(seg[steep]), vertical=True)
+    return horizontal, vertical
+
+
+def rasterize_polyline(points, algorithm="Bresenham"):
+    """Растеризует ломаную по вершинам (M, 2); общие вершины выводятся один раз.
+
+    Возвращает xs, ys (и покрытие для Ву) без повторяющихся пикселей.
+    """
+    points = np.asarray(points).reshape(-1, 2)
+    segments = np.hstack((points[:-1], points[1:]))
+    return unique_pixels(*RASTERIZERS[algorithm](segments))
+
+
+def intensity_lut(ink=(0, 0, 0), background=(255, 255, 255)):
+    """Таблица из 256 цветов: от фона (покрытие 0) до цвета линии (покрытие 1)."""
+    ink = np.asarray(ink, dtype=np.float64)
+    background = np.asarray(background, dtype=np.float64)
+    t = np.arange(256)[:, None] / 255
+    return np.rint(background + (ink - background) * t).astype(np.uint8)
+
+
+def coverage_to_rgb(coverage, lut):
+    """Переводит покрытие 0..1 в цвета по таблице intensity_lut."""
+    levels = np.rint(np.clip(coverage, 0, 1) * 255).astype(np.uint8)
+    return lut[levels]
+
+
+def accumulate_coverage(coverage, xs, ys, values, mode="max"):
+    """Накладывает покрытие пикселей на буфер (высота x ширина) с учётом повторов.
+
+    mode="max" — пиксель получает наибольшее покрытие (пересечения не темнеют),
+    mode="add" — покрытия складываются с насыщением в 1.
+    Точки вне буфера отбрасываются. Возвращает (x0, y0, x1, y1) затронутой области или None.
+    """
+    height, width = coverage.shape
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    values = np.broadcast_to(np.asarray(values, dtype=coverage.dtype), xs.shape)
+    inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+    if not inside.any():
+        return None
+    xs, ys, values = xs[inside], ys[inside], values[inside]
+
+    if mode == "add":
+        np.add.at(coverage, (ys, xs), values)
+        x0, x1, y0, y1 = xs.min(), xs.max() + 1, ys.min(), ys.max() + 1
+        np.minimum(coverage[y0:y1, x0:x1], 1, out=coverage[y0:y1, x0:x1])
+    elif mode == "max":
+        np.maximum.at(coverage, (ys, xs), values)
+    else:
+        raise ValueError(f"Неизвестный режим наложения: {mode}")
+    return int(xs.min()), int(ys.min()), int(xs.max()) + 1, int(ys.max()) + 1
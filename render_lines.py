@@ -0,0 +1,176 @@
+"""Пакетная отрисовка отрезков из файла без графического окна.
+
+Каждая строка входа содержит отрезок `x1 y1 x2 y2` (через пробелы или запятые),
+строки с `#` считаются комментариями. Вход читается порциями, поэтому расход памяти
+определяется размером растра и порции, а не длиной файла.
+
+Пример:
+    python render_lines.py lines.csv -a Wu -W 1920 -H 1080 -o out.png
+"""
+import argparse
+import itertools
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+from clipping import ClipStats, clip_steps
+from pattern_cache import PatternCache
+from rasterizers import RASTERIZERS, as_segments, accumulate_coverage, coverage_to_rgb, intensity_lut
+
+GRAY_LUT = intensity_lut()[:, 0]
+
+# Ограничение числа пикселей, растеризуемых за один вызов (определяет пик памяти)
+PIXEL_BUDGET = 1 << 20
+
+
+def read_segments(stream, chunk_size):
+    """Генератор порций отрезков в виде массивов (N, 4)."""
+    lines = (line.replace(",", " ") for line in stream)
+    while True:
+        chunk = list(itertools.islice(lines, chunk_size))
+        if not chunk:
+            return
+        segments = np.loadtxt(chunk, ndmin=2, comments="#")
+        if segments.size:
+            yield segments
+
+
+def split_by_pixels(chunks, budget=PIXEL_BUDGET):
+    """Делит порции (отрезки, диапазоны шагов или None) так, чтобы в одной было не больше
+    budget пикселей (оценка по числу шагов)."""
+    for segments, ranges in chunks:
+        segments = as_segments(segments)
+        if ranges is None:
+            lengths = np.abs(segments[:, 2:] - segments[:, :2]).max(axis=1) + 1
+        else:
+            lengths = ranges[:, 1] - ranges[:, 0] + 1
+        bounds = np.unique(np.searchsorted(np.cumsum(lengths), np.arange(budget, lengths.sum(), budget)))
+        parts = np.split(ranges, bounds) if ranges is not None else [None] * (len(bounds) + 1)
+        for part, part_ranges in zip(np.split(segments, bounds), parts):
+            if len(part):
+                yield part, part_ranges
+
+
+def clip_chunks(segments_chunks, rect, method, stats):
+    for segments in segments_chunks:
+        segments, ranges = clip_steps(segments, rect, method, stats)
+        if len(segments):
+            yield segments, ranges
+
+
+def render(segments_chunks, width, height, algorithm="Bresenham", flip_y=False, composite="max",
+           clip="Liang-Barsky", stats=None, cache=None):
+    """Растеризует порции отрезков в массив покрытия float32 (высота x ширина).
+
+    При clip=None отрезки не отсекаются, и пиксели вне растра просто отбрасываются. Отсечение
+    не меняет отрезки, а ограничивает шаги растеризации (clip_steps), поэтому пиксели в растре
+    те же, что без отсечения (у ЦДА и Ву — с оговорками из rasterizers).
+    cache — PatternCache для повторяющихся (dx, dy), например штриховок и сеток; им растеризуются
+    только отрезки, не обрезанные отсечением.
+    """
+    rasterizer = RASTERIZERS[algorithm]
+
+    def rasterize(segments, ranges):
+        if cache is None:
+            return rasterizer(segments, ranges)
+        if ranges is None:
+            return cache.rasterize(algorithm, segments)
+        major = np.abs(segments[:, 2:] - segments[:, :2]).max(axis=1)
+        whole = (ranges[:, 0] == 0) & (ranges[:, 1] == major)
+        if whole.all():
+            return cache.rasterize(algorithm, segments)
+        if not whole.any():
+            return rasterizer(segments, ranges)
+        parts = [cache.rasterize(algorithm, segments[whole]), rasterizer(segments[~whole], ranges[~whole])]
+        return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+    coverage = np.zeros((height, width), dtype=np.float32)
+    if clip is None:
+        chunks = ((segments, None) for segments in segments_chunks)
+    else:
+        chunks = clip_chunks(segments_chunks, (0, 0, width - 1, height - 1), clip,
+                             stats if stats is not None else ClipStats())
+
+    for segments, ranges in split_by_pixels(chunks):
+        result = rasterize(segments, ranges)
+        xs, ys = result[0], result[1]
+        if flip_y:
+            ys = height - 1 - ys
+        if algorithm == "Wu":
+            accumulate_coverage(coverage, xs, ys, result[2], composite)
+        else:
+            inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+            coverage[ys[inside], xs[inside]] = 1.0
+    return coverage
+
+
+def to_gray(coverage):
+    """Покрытие 0..1 -> 8-битная яркость (белый фон, чёрные линии)."""
+    return coverage_to_rgb(coverage, GRAY_LUT)
+
+
+def write_pgm(filename, gray):
+    with open(filename, "wb") as file:
+        file.write(f"P5 {gray.shape[1]} {gray.shape[0]} 255\n".encode("ascii"))
+        file.write(np.ascontiguousarray(gray).tobytes())
+
+
+def write_png(filename, gray):
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    height, width = gray.shape
+    # Каждая строка PNG начинается с байта фильтра (0 — без фильтра)
+    raw = np.hstack((np.zeros((height, 1), dtype=np.uint8), gray)).tobytes()
+    with open(filename, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        file.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)))
+        file.write(chunk(b"IDAT", zlib.compress(raw, 6)))
+        file.write(chunk(b"IEND", b""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Растеризация отрезков из файла в PGM/PNG")
+    parser.add_argument("input", help="файл с отрезками x1 y1 x2 y2 или '-' для stdin")
+    parser.add_argument("-o", "--output", required=True, help="выходной файл .pgm или .png")
+    parser.add_argument("-a", "--algorithm", choices=list(RASTERIZERS), default="Bresenham")
+    parser.add_argument("-W", "--width", type=int, default=800)
+    parser.add_argument("-H", "--height", type=int, default=600)
+    parser.add_argument("--chunk", type=int, default=65536, help="число отрезков в порции")
+    parser.add_argument("--composite", choices=["max", "add"], default="max",
+                        help="наложение сглаженных пикселей Ву")
+    parser.add_argument("--clip", choices=["Liang-Barsky", "Cohen-Sutherland", "none"], default="Liang-Barsky",
+                        help="отсечение отрезков по растру до растеризации")
+    parser.add_argument("--cache-mb", type=float, default=0,
+                        help="объём кэша шаблонов отрезков в МБ (0 — без кэша)")
+    parser.add_argument("--flip-y", action="store_true", help="ось Y направлена вверх, как в lab1.py")
+    args = parser.parse_args(argv)
+    clip = None if args.clip == "none" else args.clip
+    stats = ClipStats()
+    cache = PatternCache(int(args.cache_mb * 2 ** 20)) if args.cache_mb > 0 else None
+
+    if args.input == "-":
+        coverage = render(read_segments(sys.stdin, args.chunk), args.width, args.height,
+                          args.algorithm, args.flip_y, args.composite, clip, stats, cache)
+    else:
+        with open(args.input, "r") as stream:
+            coverage = render(read_segments(stream, args.chunk), args.width, args.height,
+                              args.algorithm, args.flip_y, args.composite, clip, stats, cache)
+
+    if clip is not None:
+        print(f"Отсечение: {stats}", file=sys.stderr)
+    if cache is not None:
+        print(f"Кэш шаблонов: {cache}", file=sys.stderr)
+
+    gray = to_gray(coverage)
+    if args.output.lower().endswith(".png"):
+        write_png(args.output, gray)
+    else:
+        write_pgm(args.output, gray)
+
+
+if __name__ == "__main__":
+    main()
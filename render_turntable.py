@@ -0,0 +1,132 @@
+"""Отрисовка модели с поворотом (turntable) в последовательность изображений без окна.
+
+Кадры распределяются по пулу процессов; массивы сетки копируются один раз в блок
+разделяемой памяти, и процессы читают их оттуда, а не получают копию с каждой задачей.
+Рисование идёт теми же функциями, что и в lab4.py, на внеэкранную поверхность pygame
+(видеодрайвер SDL "dummy").
+
+Пример:
+    python render_turntable.py model.obj -n 72 -m Z-buffer -j 8 -o frames/frame_{:04d}.png
+"""
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import math
+import multiprocessing
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+
+from lab4 import RENDER_MODES, SceneState, build_transformation, render_frame
+from lod import Level
+from mesh_io import Mesh, face_winding, read_mesh
+
+# Состояние процесса пула: блок разделяемой памяти, сцена без поворота и поверхность кадра
+worker_block = None
+worker_scene = None
+worker_surface = None
+
+
+def share_mesh(mesh):
+    """Копирует массивы сетки в новый блок разделяемой памяти.
+
+    Возвращает блок и раскладку [(поле, dtype, форма, смещение)], по которой attach_mesh
+    собирает сетку в другом процессе.
+    """
+    arrays = [(field, np.ascontiguousarray(value)) for field, value in zip(Mesh._fields, mesh)
+              if value is not None]
+    layout, size = [], 0
+    for field, array in arrays:
+        layout.append((field, array.dtype.str, array.shape, size))
+        # Каждый массив начинается с границы 64 байт
+        size += -(-array.nbytes // 64) * 64
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for (field, dtype, shape, offset), (_, array) in zip(layout, arrays):
+        np.ndarray(shape, dtype, block.buf, offset)[...] = array
+    return block, layout
+
+
+def attach_mesh(name, layout):
+    """Подключается к блоку разделяемой памяти и возвращает (блок, сетка из массивов-видов на него)."""
+    block = shared_memory.SharedMemory(name=name)
+    arrays = {}
+    for field, dtype, shape, offset in layout:
+        array = np.ndarray(shape, dtype, block.buf, offset)
+        array.flags.writeable = False
+        arrays[field] = array
+    return block, Mesh(**arrays)
+
+
+def init_worker(name, layout, scene, size, winding):
+    global worker_block, worker_scene, worker_surface
+    worker_block, mesh = attach_mesh(name, layout)
+    worker_scene = scene._replace(mesh=mesh, levels=(Level(mesh, 0.0, winding),))
+    worker_surface = pygame.Surface(size)
+
+
+def render_task(task):
+    """Рисует и сохраняет один кадр: task = (номер, угол в градусах, ось, имя файла)."""
+    index, angle, axis, filename = task
+    state = worker_scene._replace(**{f"angle_{axis}": getattr(worker_scene, f"angle_{axis}") + math.radians(angle)})
+    state = state._replace(matrix=build_transformation(state))
+    render_frame(worker_surface, state)
+    pygame.image.save(worker_surface, filename)
+    return index
+
+
+def render_turntable(mesh, scene, tasks, size, jobs):
+    """Рисует кадры tasks в jobs процессах; возвращает число готовых кадров."""
+    block, layout = share_mesh(mesh)
+    # Обход граней определяется один раз для модели, а не в каждом процессе
+    initargs = (block.name, layout, scene, size, face_winding(mesh))
+    try:
+        if jobs == 1:
+            init_worker(*initargs)
+            return sum(1 for _ in map(render_task, tasks))
+        with multiprocessing.Pool(jobs, init_worker, initargs) as pool:
+            return sum(1 for _ in pool.imap_unordered(render_task, tasks))
+    finally:
+        block.close()
+        block.unlink()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Отрисовка модели с поворотом в последовательность изображений")
+    parser.add_argument("model", help="модель .txt или .obj")
+    parser.add_argument("-o", "--output", default="frame_{:04d}.png",
+                        help="шаблон имени кадра для str.format (расширение задаёт формат: .png, .bmp, .jpg)")
+    parser.add_argument("-n", "--frames", type=int, default=36)
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="число процессов")
+    parser.add_argument("-m", "--mode", choices=RENDER_MODES, default="Solid")
+    parser.add_argument("-W", "--width", type=int, default=800)
+    parser.add_argument("-H", "--height", type=int, default=600)
+    parser.add_argument("--axis", choices=["x", "y", "z"], default="y", help="ось поворота")
+    parser.add_argument("--sweep", type=float, default=360.0, help="угол поворота за всю последовательность, градусы")
+    parser.add_argument("--tilt", type=float, default=0.0, help="наклон вокруг оси X, градусы")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--distance", type=float, default=5.0)
+    parser.add_argument("--antialias", action="store_true", help="сглаженные рёбра в режиме Wireframe")
+    args = parser.parse_args(argv)
+
+    mesh = read_mesh(args.model)
+    scene = SceneState(angle_x=math.radians(args.tilt), scale=args.scale, distance=args.distance,
+                       render_mode=args.mode, antialias=args.antialias)
+    # Полный оборот не повторяет первый кадр в конце последовательности
+    step = args.sweep / (args.frames if abs(args.sweep) % 360 == 0 else max(args.frames - 1, 1))
+    tasks = [(i, i * step, args.axis, args.output.format(i)) for i in range(args.frames)]
+    for directory in {os.path.dirname(task[3]) for task in tasks} - {""}:
+        os.makedirs(directory, exist_ok=True)
+
+    start = time.perf_counter()
+    count = render_turntable(mesh, scene, tasks, (args.width, args.height), max(args.jobs, 1))
+    elapsed = time.perf_counter() - start
+    print(f"Кадров: {count}, {elapsed:.2f} с ({count / elapsed:.1f} кадр/с)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
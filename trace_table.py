@@ -0,0 +1,131 @@
+import csv
+import math
+import tkinter as tk
+from tkinter import ttk, filedialog
+
+import numpy as np
+
+
+class TraceRecorder:
+    """Колоночный кольцевой буфер строк трассировки (итерация, X, Y, ошибка, ...).
+
+    Хранит не больше capacity последних строк; более старые вытесняются,
+    их число доступно в `dropped`. Пропущенные значения хранятся как NaN
+    и выводятся как "---"; formats — спецификации format() для каждой колонки.
+    """
+
+    def __init__(self, columns, capacity=100000, formats=None):
+        self.capacity = capacity
+        self.reset(columns, formats)
+
+    def reset(self, columns=None, formats=None):
+        if columns is not None:
+            self.columns = list(columns)
+            self.formats = list(formats) if formats else ["g"] * len(self.columns)
+            if getattr(self, "data", None) is None or self.data.shape[0] != len(self.columns):
+                self.data = np.empty((len(self.columns), self.capacity), dtype=np.float64)
+        self.count = 0
+
+    def clear(self):
+        self.reset()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def dropped(self):
+        return max(self.count - self.capacity, 0)
+
+    def append(self, *values):
+        self.data[:, self.count % self.capacity] = values
+        self.count += 1
+
+    def extend(self, *columns):
+        """Добавляет сразу много строк, по массиву на колонку."""
+        columns = np.broadcast_arrays(*[np.asarray(c, dtype=np.float64) for c in columns])
+        n = len(columns[0])
+        tail = np.stack(columns)[:, max(n - self.capacity, 0):]
+        positions = (self.count + n - tail.shape[1] + np.arange(tail.shape[1])) % self.capacity
+        self.data[:, positions] = tail
+        self.count += n
+
+    def rows(self, start, stop):
+        """Строки с номерами [start, stop) среди сохранённых, от старых к новым."""
+        stop = min(stop, len(self))
+        if start >= stop:
+            return np.empty((0, len(self.columns)))
+        first = self.count - len(self)
+        positions = (first + np.arange(start, stop)) % self.capacity
+        return self.data[:, positions].T
+
+    def format_row(self, row):
+        return ["---" if math.isnan(value) else format(value, fmt) for value, fmt in zip(row, self.formats)]
+
+    def to_csv(self, filename, chunk=65536):
+        with open(filename, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(self.columns)
+            for start in range(0, len(self), chunk):
+                writer.writerows(self.format_row(row) for row in self.rows(start, start + chunk))
+
+
+class TraceView(ttk.Frame):
+    """Виртуализированная таблица: в виджет выводятся только видимые строки буфера."""
+
+    def __init__(self, master, recorder, height=10, **kwargs):
+        super().__init__(master, **kwargs)
+        self.recorder = recorder
+        self.first = 0
+
+        self.header = ttk.Label(self, anchor=tk.W, font="TkFixedFont")
+        self.header.pack(fill=tk.X)
+
+        body = ttk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.text = tk.Text(body, height=height, wrap=tk.NONE, font="TkFixedFont", state=tk.DISABLED)
+        self.scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.text.bind("<MouseWheel>", lambda e: self.yview("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.text.bind("<Button-4>", lambda e: self.yview("scroll", -1, "units"))
+        self.text.bind("<Button-5>", lambda e: self.yview("scroll", 1, "units"))
+        self.text.bind("<Configure>", lambda e: self.refresh())
+
+    def visible_rows(self):
+        line_height = max(self.text.tk.call("font", "metrics", self.text.cget("font"), "-linespace"), 1)
+        return max(self.text.winfo_height() // line_height, int(self.text.cget("height")))
+
+    def yview(self, *args):
+        total, visible = len(self.recorder), self.visible_rows()
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            amount = int(args[1]) * (visible if args[2] == "pages" else 1)
+            self.first += amount
+        self.refresh()
+        return "break"
+
+    def refresh(self):
+        total, visible = len(self.recorder), self.visible_rows()
+        self.first = max(0, min(self.first, total - visible))
+
+        widths = [max(len(name), 10) for name in self.recorder.columns]
+        self.header.config(text="  ".join(name.ljust(w) for name, w in zip(self.recorder.columns, widths)))
+        lines = ["  ".join(value.ljust(w) for value, w in zip(self.recorder.format_row(row), widths))
+                 for row in self.recorder.rows(self.first, self.first + visible)]
+
+        self.text.config(state=tk.NORMAL)
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, "\n".join(lines))
+        self.text.config(state=tk.DISABLED)
+
+        if total:
+            self.scrollbar.set(self.first / total, min((self.first + visible) / total, 1.0))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def export_csv(self):
+        filename = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV", "*.csv")])
+        if filename:
+            self.recorder.to_csv(filename)
@@ -0,0 +1,100 @@
+import numpy as np
+
+# Наибольшее число точек-кандидатов, проверяемых за один проход (определяет пик памяти)
+SAMPLE_BUDGET = 1 << 21
+
+
+def _size_class(n):
+    """Ближайшая сверху степень двойки — размер сетки выборки по оси."""
+    return 1 << np.ceil(np.log2(np.maximum(n, 1))).astype(np.int64)
+
+
+class ZBuffer:
+    """Буфер цвета и глубины для растеризации треугольников массивами NumPy.
+
+    Глубина хранится как 1/z (z — расстояние от камеры вдоль оси взгляда): эта величина
+    линейна в экранных координатах, больше — ближе, 0 — пустой пиксель. Треугольники
+    группируются по размеру описанного прямоугольника, и для каждой группы все точки
+    прямоугольников проверяются барицентрическими координатами за один проход.
+    """
+
+    def __init__(self, width, height, background=(255, 255, 255)):
+        self.background = np.asarray(background, dtype=np.uint8)
+        self.color = np.empty((height, width, 3), dtype=np.uint8)
+        self.depth = np.empty((height, width), dtype=np.float32)
+        self.clear()
+
+    @property
+    def width(self):
+        return self.depth.shape[1]
+
+    @property
+    def height(self):
+        return self.depth.shape[0]
+
+    def clear(self):
+        self.color[:] = self.background
+        self.depth[:] = 0
+
+    def resize(self, width, height):
+        if (width, height) != (self.width, self.height):
+            self.__init__(width, height, self.background)
+
+    def draw_triangles(self, points, inverse_depth, triangles, colors):
+        """Рисует треугольники с проверкой глубины.
+
+        points (N, 2) — экранные координаты вершин, inverse_depth (N,) — 1/z вершин,
+        triangles (T, 3) — номера вершин, colors (T, 3) — цвет каждого треугольника.
+        """
+        p = points[triangles]
+        d = inverse_depth[triangles].astype(np.float32)
+        colors = np.asarray(colors, dtype=np.uint8)
+
+        x0 = np.floor(p[:, :, 0].min(axis=1))
+        y0 = np.floor(p[:, :, 1].min(axis=1))
+        x1 = np.ceil(p[:, :, 0].max(axis=1))
+        y1 = np.ceil(p[:, :, 1].max(axis=1))
+        area = ((p[:, 1, 0] - p[:, 0, 0]) * (p[:, 2, 1] - p[:, 0, 1]) -
+                (p[:, 2, 0] - p[:, 0, 0]) * (p[:, 1, 1] - p[:, 0, 1]))
+        keep = (np.isfinite(area) & (area != 0) & (d > 0).all(axis=1) &
+                (x1 >= 0) & (y1 >= 0) & (x0 < self.width) & (y0 < self.height))
+        x0 = np.maximum(x0, 0)
+        y0 = np.maximum(y0, 0)
+        x1 = np.minimum(x1, self.width - 1)
+        y1 = np.minimum(y1, self.height - 1)
+
+        keep = np.flatnonzero(keep)
+        widths = _size_class(x1[keep] - x0[keep] + 1)
+        heights = _size_class(y1[keep] - y0[keep] + 1)
+        classes = widths << 32 | heights
+        for size in np.unique(classes):
+            group = keep[classes == size]
+            sw, sh = int(size >> 32), int(size & 0xFFFFFFFF)
+            batch = max(SAMPLE_BUDGET // (sw * sh), 1)
+            for start in range(0, len(group), batch):
+                tri = group[start:start + batch]
+                self._fill(p[tri], d[tri], area[tri], x0[tri], y0[tri], x1[tri], y1[tri], colors[tri], sw, sh)
+
+    def _fill(self, p, d, area, x0, y0, x1, y1, colors, sw, sh):
+        gy, gx = np.divmod(np.arange(sw * sh), sw)
+        xs = x0[:, None] + gx
+        ys = y0[:, None] + gy
+        # Центры пикселей; барицентрические координаты через функции рёбер
+        px, py = xs + 0.5, ys + 0.5
+        w0 = ((p[:, 2, 0] - p[:, 1, 0])[:, None] * (py - p[:, 1, 1, None]) -
+              (p[:, 2, 1] - p[:, 1, 1])[:, None] * (px - p[:, 1, 0, None])) / area[:, None]
+        w1 = ((p[:, 0, 0] - p[:, 2, 0])[:, None] * (py - p[:, 2, 1, None]) -
+              (p[:, 0, 1] - p[:, 2, 1])[:, None] * (px - p[:, 2, 0, None])) / area[:, None]
+        w2 = 1 - w0 - w1
+        inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0) & (xs <= x1[:, None]) & (ys <= y1[:, None])
+
+        tri, sample = np.nonzero(inside)
+        pixels = ys[tri, sample].astype(np.int64) * self.width + xs[tri, sample].astype(np.int64)
+        z = (w0[tri, sample] * d[tri, 0] + w1[tri, sample] * d[tri, 1] +
+             w2[tri, sample] * d[tri, 2]).astype(np.float32)
+
+        depth = self.depth.reshape(-1)
+        np.maximum.at(depth, pixels, z)
+        # Цвет получает та точка, чья глубина осталась в буфере
+        won = z >= depth[pixels]
+        self.color.reshape(-1, 3)[pixels[won]] = colors[tri[won]]